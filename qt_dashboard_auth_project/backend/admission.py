@@ -0,0 +1,171 @@
+"""Admission control and rate limiting for the CPU-bound auth endpoints.
+
+``/login`` and ``/register`` each cost a bcrypt computation. Without a limit a
+credential-stuffing burst queues unbounded work and latency grows for every
+client. Two mechanisms sit in front of the hashing path:
+
+* ``AdmissionController`` caps concurrent hashing work, lets a bounded number
+  of requests wait for a short time and sheds the rest with ``503`` and a
+  ``Retry-After`` header.
+* ``RateLimiter`` keeps in-memory token buckets per client IP and per email
+  so that a single source cannot monopolize the CPU (``429``).
+
+All state lives on the event loop thread and is only touched from ``async``
+handlers, so no locking is needed.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+
+class AdmissionRejected(HTTPException):
+    """A request turned away before doing any expensive work."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class Overloaded(AdmissionRejected):
+    def __init__(self, retry_after: float = 1.0):
+        super().__init__(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Server is busy, please retry shortly",
+            retry_after,
+        )
+
+
+class RateLimited(AdmissionRejected):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            "Too many attempts, please retry later",
+            retry_after,
+        )
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._active = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block or raise ``Overloaded``."""
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                self.shed += 1
+                raise Overloaded(self.queue_timeout)
+            self.queued += 1
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise Overloaded(self.queue_timeout)
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.admitted += 1
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "waiting": self._waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+        }
+
+
+class RateLimiter:
+    """Token buckets keyed by an arbitrary string (IP, email, ...).
+
+    Each key refills at ``rate`` tokens per second up to ``burst``. Only the
+    ``max_keys`` most recently used keys are tracked; evicting an idle key is
+    harmless because a fresh bucket starts full anyway.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key: str) -> None:
+        """Take one token for ``key`` or raise ``RateLimited``."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self._buckets[key] = (tokens, now)
+            self.limited += 1
+            raise RateLimited((1.0 - tokens) / self.rate)
+        self._buckets[key] = (tokens - 1.0, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        self.allowed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+hash_admission = AdmissionController(
+    max_concurrent=settings.admission_concurrency,
+    max_queue=settings.admission_queue_size,
+    queue_timeout=settings.admission_queue_timeout,
+)
+ip_limiter = RateLimiter(
+    rate=settings.rate_limit_ip_per_second,
+    burst=settings.rate_limit_ip_burst,
+    max_keys=settings.rate_limit_max_keys,
+)
+email_limiter = RateLimiter(
+    rate=settings.rate_limit_email_per_second,
+    burst=settings.rate_limit_email_burst,
+    max_keys=settings.rate_limit_max_keys,
+)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        **hash_admission.stats(),
+        "ip_limiter": ip_limiter.stats(),
+        "email_limiter": email_limiter.stats(),
+    }
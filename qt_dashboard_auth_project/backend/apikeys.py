@@ -0,0 +1,100 @@
+"""API keys for machine clients, verified with a keyed digest instead of bcrypt.
+
+A key looks like ``qtk_<prefix>_<secret>``. The prefix is stored in clear in
+a unique, indexed column, so finding a key is one index lookup; only an
+HMAC-SHA256 of the secret is stored and it is compared in constant time.
+Secrets are 256 random bits, so unlike passwords they need no slow hash:
+checking one costs microseconds instead of a bcrypt round.
+
+The HMAC key is ``AUTH_API_KEY_HMAC_SECRET`` when set, else a random key
+kept in ``api-key-hmac.key`` inside ``AUTH_JWT_KEY_DIR`` (created on first
+use), else ``auth.SECRET_KEY``. Changing it invalidates every issued key.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from schemas import UserResponse
+
+logger = logging.getLogger(__name__)
+
+KEY_SCHEME = "qtk"
+PREFIX_BYTES = 6
+SECRET_BYTES = 32
+HMAC_KEY_FILE = "api-key-hmac.key"
+
+_hmac_key: Optional[bytes] = None
+_hmac_key_lock = threading.Lock()
+
+
+def _load_hmac_key() -> bytes:
+    if settings.api_key_hmac_secret:
+        return settings.api_key_hmac_secret.encode("utf-8")
+    if settings.jwt_key_dir:
+        path = Path(settings.jwt_key_dir) / HMAC_KEY_FILE
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # O_EXCL: when several workers start at once, one creates it and the rest read it
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return bytes.fromhex(path.read_text().strip())
+        except OSError:
+            logger.exception("Could not create %s; falling back to SECRET_KEY", path)
+        else:
+            key = secrets.token_bytes(32)
+            with os.fdopen(fd, "w") as fh:
+                fh.write(key.hex())
+            logger.info("Created API key HMAC key %s", path)
+            return key
+    from auth import SECRET_KEY
+    return SECRET_KEY.encode("utf-8")
+
+
+def hmac_key() -> bytes:
+    global _hmac_key
+    if _hmac_key is None:
+        with _hmac_key_lock:
+            if _hmac_key is None:
+                _hmac_key = _load_hmac_key()
+    return _hmac_key
+
+
+def digest_secret(secret: str) -> str:
+    return hmac.new(hmac_key(), secret.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def generate_key() -> Tuple[str, str, str]:
+    """A new ``(key, prefix, digest)``; only the prefix and digest are stored."""
+    prefix = secrets.token_hex(PREFIX_BYTES)
+    secret = secrets.token_urlsafe(SECRET_BYTES)
+    return f"{KEY_SCHEME}_{prefix}_{secret}", prefix, digest_secret(secret)
+
+
+def parse_key(key: str) -> Optional[Tuple[str, str]]:
+    """``(prefix, secret)`` of a well-formed key, else None."""
+    scheme, _, rest = key.partition("_")
+    prefix, _, secret = rest.partition("_")
+    if scheme != KEY_SCHEME or len(prefix) != 2 * PREFIX_BYTES or not secret:
+        return None
+    return prefix, secret
+
+
+def secret_matches(secret: str, digest: Optional[str]) -> bool:
+    """Constant-time check of ``secret`` against a stored digest.
+
+    The digest is computed even when there is no stored one, so an unknown
+    prefix takes as long to reject as a wrong secret.
+    """
+    computed = digest_secret(secret)
+    return hmac.compare_digest(computed, digest if digest is not None else "0" * len(computed))
+
+
+def cache_entry(api_key, user) -> Dict[str, Any]:
+    """What ``api_key_cache`` keeps per prefix for an active key and its owner."""
+    return {"id": api_key.id, "digest": api_key.secret_digest, "user": UserResponse.model_validate(user)}
@@ -0,0 +1,183 @@
+import hashlib
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
+
+import jwt
+
+from cache import token_cache
+from config import settings
+from hashers import Argon2idHasher, BcryptHasher, Hasher, hasher_for
+from metrics import BCRYPT_COST, JWT_LATENCY
+from revocation import revocations
+
+# Change this in production! Only used when AUTH_JWT_ALGORITHM=HS256;
+# asymmetric algorithms sign with the rotating keys from keys.py.
+SECRET_KEY = "your-secret-key-change-this-in-production"
+ALGORITHM = settings.jwt_algorithm
+ASYMMETRIC = ALGORITHM != "HS256"
+
+if ASYMMETRIC:
+    from keys import get_key_store
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+_JWT_ENCODE = JWT_LATENCY.labels("encode")
+_JWT_DECODE = JWT_LATENCY.labels("decode")
+
+
+def _configured_hasher() -> Hasher:
+    if settings.password_hasher == "argon2id":
+        return Argon2idHasher.from_profile(
+            settings.argon2_profile,
+            time_cost=settings.argon2_time_cost,
+            memory_cost=settings.argon2_memory_kib,
+            parallelism=settings.argon2_parallelism,
+        )
+    # AUTH_BCRYPT_ROUNDS, or 12 until calibrate_bcrypt_rounds() runs at startup
+    return BcryptHasher(settings.bcrypt_rounds or 12)
+
+
+# The hasher new hashes are created with
+_hasher: Hasher = _configured_hasher()
+if isinstance(_hasher, BcryptHasher):
+    BCRYPT_COST.set(_hasher.rounds)
+
+
+def get_hasher() -> Hasher:
+    """The hasher new hashes are created with."""
+    return _hasher
+
+
+def set_hasher(hasher: Hasher) -> None:
+    global _hasher
+    _hasher = hasher
+    if isinstance(hasher, BcryptHasher):
+        BCRYPT_COST.set(hasher.rounds)
+
+
+def calibrate_bcrypt_rounds(budget_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """Largest cost in ``[min_rounds, max_rounds]`` whose hash fits ``budget_ms`` here.
+
+    Each extra round doubles the work, so a few cheap hashes are timed and
+    extrapolated; the pick is then timed once for real and stepped down if
+    it overshoots. ``min_rounds`` wins over the budget on slow hardware.
+    """
+    probe_rounds = 6
+    probe = min(_time_hash(probe_rounds) for _ in range(3))
+    rounds = min_rounds
+    while rounds < max_rounds and probe * 2 ** (rounds + 1 - probe_rounds) <= budget_ms / 1000:
+        rounds += 1
+    while rounds > min_rounds and _time_hash(rounds) > budget_ms / 1000:
+        rounds -= 1
+    return rounds
+
+
+def _time_hash(rounds: int) -> float:
+    start = time.perf_counter()
+    BcryptHasher(rounds).hash("calibration-password")
+    return time.perf_counter() - start
+
+
+def hash_password(password: str) -> str:
+    """Hash a password with the configured hasher."""
+    return _hasher.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Check a plain password against a stored bcrypt or Argon2 hash."""
+    hasher = hasher_for(hashed_password, preferred=_hasher)
+    return hasher is not None and hasher.verify(plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash has another algorithm or parameters than new hashes get."""
+    return not _hasher.identifies(hashed_password) or _hasher.needs_rehash(hashed_password)
+
+
+def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    """Create a signed JWT access token."""
+    to_encode = data.copy()
+    expire = datetime.now(timezone.utc) + (
+        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    to_encode["exp"] = expire
+    # Unique token id, the handle for revoking this token on /logout
+    to_encode["jti"] = secrets.token_urlsafe(16)
+    with _JWT_ENCODE.time():
+        if ASYMMETRIC:
+            key = get_key_store().signing_key()
+            return jwt.encode(to_encode, key.private_key, algorithm=ALGORITHM, headers={"kid": key.kid})
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_refresh_token() -> Tuple[str, str]:
+    """A new opaque refresh token and the digest stored for it.
+
+    The token is 256 random bits, so a plain SHA-256 is enough to keep the
+    stored value useless to a database reader; no password hasher involved.
+    """
+    token = secrets.token_urlsafe(32)
+    return token, refresh_token_digest(token)
+
+
+def refresh_token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def jwks_document() -> bytes:
+    """Serialized JWK Set of the token-signing public keys (empty for HS256)."""
+    if not ASYMMETRIC:
+        return b'{"keys":[]}'
+    return get_key_store().jwks()
+
+
+def _verification_key(token: str) -> Any:
+    if not ASYMMETRIC:
+        return SECRET_KEY
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = get_key_store().public_key(kid) if kid else None
+    if key is None:
+        raise jwt.InvalidKeyError("Unknown signing key")
+    return key
+
+
+def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decode a JWT token; return its claims or None if invalid/expired."""
+    try:
+        with _JWT_DECODE.time():
+            payload = jwt.decode(token, _verification_key(token), algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    email = payload.get("sub")
+    if email is None:
+        return None
+    return {"email": email, "exp": payload.get("exp"), "jti": payload.get("jti")}
+
+
+def _verify_and_remember(digest: bytes, token: str) -> Optional[Dict[str, Any]]:
+    claims = verify_token(token)
+    if claims is not None and claims.get("exp") is not None:
+        ttl = min(claims["exp"] - time.time(), token_cache.ttl)
+        if ttl > 0:
+            token_cache.set(digest, claims, ttl=ttl)
+    return claims
+
+
+def verify_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    """``verify_token`` memoized until the token expires.
+
+    Only successful verifications are cached, so garbage tokens cannot fill
+    the cache. Revoked tokens are rejected on every call, cached or not.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
+        claims = _verify_and_remember(digest, token)
+    if claims is not None and revocations.is_revoked(claims["jti"]):
+        return None
+    return claims
+
+
+def token_cache_stats() -> Dict[str, Any]:
+    return token_cache.stats()
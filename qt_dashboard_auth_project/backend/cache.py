@@ -0,0 +1,97 @@
+"""In-process caches for hot, rarely changing data."""
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from config import settings
+
+if TYPE_CHECKING:
+    from schemas import UserResponse
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``get`` refreshes recency but never extends an entry's lifetime, so the
+    TTL bounds how stale a value can get even if an invalidation is missed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Public user info keyed by the token subject, as validated ``UserResponse``
+# instances that responses serialize directly (treat them as read-only)
+principal_cache: TTLCache["UserResponse"] = TTLCache(
+    maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl
+)
+
+# Active API keys by prefix: key id, secret digest and the owner's public info
+api_key_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    maxsize=settings.api_key_cache_size, ttl=settings.api_key_cache_ttl
+)
+
+# Decoded claims of already verified tokens, keyed by the token's SHA-256
+# digest and kept until the token's own expiry
+token_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    maxsize=settings.token_cache_size, ttl=settings.token_cache_max_ttl
+)
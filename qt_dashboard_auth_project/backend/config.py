@@ -0,0 +1,160 @@
+"""Runtime settings for the auth backend.
+
+Every value can be overridden with an ``AUTH_``-prefixed environment variable
+(for example ``AUTH_HASH_WORKERS=8``) or a ``.env`` file in the working
+directory.
+"""
+import os
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="AUTH_", env_file=".env", extra="ignore")
+
+    # SQLite database (you can change to PostgreSQL/MySQL later)
+    database_url: str = "sqlite:///./users.db"
+    # "async" serves requests through the aiosqlite driver without holding a
+    # thread per query; "sync" keeps the classic threadpool + pysqlite path.
+    db_mode: Literal["async", "sync"] = "async"
+    # SQLite writes go through one writer connection with group commit
+    single_writer: bool = True
+    writer_max_batch: int = 256
+    writer_max_delay_ms: float = 2.0
+
+    # Connection pools (per engine). anyio's threadpool runs up to 40 sync
+    # handlers at once, so the pool should not be the bottleneck.
+    db_pool_size: int = 20
+    db_pool_max_overflow: int = 20
+    db_pool_timeout: float = 10.0
+    # SQLAlchemy's compiled-statement cache (per engine)
+    db_query_cache_size: int = 500
+
+    # SQLite connection profile, applied to every new connection
+    sqlite_tuning: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    sqlite_busy_timeout_ms: float = 5000.0
+    # Prepared statements cached by the sqlite3 driver per connection
+    sqlite_statement_cache_size: int = 256
+
+    # Password hashing executor: bcrypt releases the GIL, so a thread pool
+    # scales with cores; "process" isolates hashing from the server process.
+    hash_executor: Literal["thread", "process"] = "thread"
+    hash_workers: int = os.cpu_count() or 1
+    # Jobs allowed to wait for a free worker before new ones are rejected
+    hash_queue_size: int = 64
+
+    # Algorithm for new password hashes. Stored bcrypt and Argon2 hashes both
+    # verify either way, and are migrated to this one on login.
+    password_hasher: Literal["bcrypt", "argon2id"] = "bcrypt"
+    # Named Argon2id parameters (see hashers.ARGON2_PROFILES); the three
+    # values below override single parameters of the profile
+    argon2_profile: str = "interactive"
+    argon2_time_cost: Optional[int] = None
+    argon2_memory_kib: Optional[int] = None
+    argon2_parallelism: Optional[int] = None
+
+    # bcrypt cost factor. Unset, the largest cost whose hash takes at most
+    # bcrypt_budget_ms on this machine is picked at startup (clamped to the
+    # min/max). Pin it when hosts of different speeds share one database,
+    # or logins will keep rehashing between their costs.
+    bcrypt_rounds: Optional[int] = None
+    bcrypt_budget_ms: float = 250.0
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 16
+
+    # Admission control in front of the hashing path: concurrent hash jobs,
+    # how many requests may wait for a slot, and for how long (seconds)
+    admission_concurrency: int = os.cpu_count() or 1
+    admission_queue_size: int = 32
+    admission_queue_timeout: float = 0.5
+
+    # In-memory token buckets for /login and /register
+    rate_limit_ip_per_second: float = 5.0
+    rate_limit_ip_burst: int = 20
+    rate_limit_email_per_second: float = 0.2
+    rate_limit_email_burst: int = 5
+    rate_limit_max_keys: int = 100_000
+
+    # Public user info served by /verify without a database round-trip
+    principal_cache_size: int = 10_000
+    principal_cache_ttl: float = 300.0
+
+    # Verified-token memo: entry cap, and an upper bound on how long claims
+    # are kept (they never outlive the token's own "exp")
+    token_cache_size: int = 50_000
+    token_cache_max_ttl: float = 3600.0
+
+    # Access token revocation (/logout): revoked-and-unexpired tokens the
+    # Bloom filter is sized for (it grows past that), its false-positive
+    # rate, and how often expired revocations are swept and those made by
+    # other worker processes are loaded
+    revocation_capacity: int = 100_000
+    revocation_error_rate: float = 0.001
+    revocation_sweep_seconds: float = 30.0
+
+    # Refresh tokens (/token/refresh): lifetime of each token in a rotation
+    # chain. Every refresh replaces the token; presenting a replaced one
+    # again revokes the whole chain.
+    refresh_token_days: float = 14.0
+
+    # API keys for machine clients: HMAC key for the stored secret digests
+    # (unset: a random key persisted in jwt_key_dir), and the cache of
+    # looked-up keys by prefix. Revocations reach other worker processes
+    # within api_key_cache_ttl seconds.
+    api_key_hmac_secret: Optional[str] = None
+    api_key_cache_size: int = 10_000
+    api_key_cache_ttl: float = 60.0
+
+    # Schema migrations (migrations.py): rows per transaction when a
+    # migration backfills a new column, and the pause between batches that
+    # lets requests write in the meantime
+    migration_batch_size: int = 1000
+    migration_batch_pause_ms: float = 10.0
+
+    # Start-up warm-up, run in the background by the lifespan; /readyz
+    # answers 503 until it is done. It opens warmup_connections connections
+    # per pool, runs the hot queries once, runs one hash per hashing worker,
+    # signs and decodes a token and loads up to warmup_cache_entries recent
+    # users and API keys into their caches.
+    warmup_enabled: bool = True
+    warmup_connections: int = 4
+    warmup_cache_entries: int = 1000
+
+    # /readyz: results are reused for readiness_cache_seconds; not ready
+    # when the database ping takes longer than readiness_db_timeout seconds
+    # or the hashing executor is at readiness_max_hash_load of its capacity
+    # (workers + queue).
+    readiness_cache_seconds: float = 1.0
+    readiness_db_timeout: float = 1.0
+    readiness_max_hash_load: float = 1.0
+
+    # Latency histograms and counters served on /metrics. Off removes the
+    # per-request middleware and per-query timing as well.
+    metrics_enabled: bool = True
+    # Server-Timing header with the hash/db/jwt/serialize breakdown, and a
+    # warning log for requests slower than slow_request_ms (0 disables it)
+    server_timing: bool = True
+    slow_request_ms: float = 0.0
+
+    # Upper bound on tokens accepted by POST /verify/batch
+    verify_batch_max_tokens: int = 1000
+    # Upper bound on users accepted by POST /register/batch
+    register_batch_max_users: int = 10_000
+
+    # Token signing: "EdDSA"/"ES256" sign with rotating keys published on
+    # /.well-known/jwks.json; "HS256" uses the shared SECRET_KEY in auth.py.
+    jwt_algorithm: Literal["EdDSA", "ES256", "HS256"] = "EdDSA"
+    jwt_key_dir: Optional[str] = "./keys"
+    jwt_key_rotation_days: float = 30.0
+    # Retired keys always kept (published and accepted); older ones are
+    # deleted once every token they signed has expired
+    jwt_keys_retained: int = 2
+
+
+settings = Settings()
@@ -0,0 +1,223 @@
+"""Database queries used by the API endpoints.
+
+Each function takes a sync ``Session`` as its first argument. Reads are
+called through ``database.run_db`` so that they work in both engine modes;
+writes go through ``writer.run_write``, which owns the commit (the write
+functions here only flush). Functions that write a user row also drop its
+``principal_cache`` entry.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from cache import principal_cache
+from models import ApiKey, RefreshSession, RevokedToken, User
+from schemas import normalize_email
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Case-insensitive lookup through the unique ``email_normalized`` index."""
+    return db.execute(
+        select(User).where(User.email_normalized == normalize_email(email))
+    ).scalar_one_or_none()
+
+
+def get_recent_users(db: Session, limit: int) -> List[User]:
+    """The ``limit`` most recently registered users."""
+    return list(db.execute(select(User).order_by(User.id.desc()).limit(limit)).scalars())
+
+
+# Stay well below SQLite's bound-parameter limit in IN (...) lists
+IN_CHUNK_SIZE = 500
+
+
+def get_users_by_emails(db: Session, emails: Iterable[str]) -> List[User]:
+    """Fetch many users with one ``IN`` query per chunk of emails."""
+    emails = [normalize_email(email) for email in emails]
+    users: List[User] = []
+    for start in range(0, len(emails), IN_CHUNK_SIZE):
+        chunk = emails[start:start + IN_CHUNK_SIZE]
+        users.extend(db.execute(select(User).where(User.email_normalized.in_(chunk))).scalars())
+    return users
+
+
+def get_existing_emails(db: Session, emails: Iterable[str]) -> Set[str]:
+    """Normalized forms of the ``emails`` that already belong to a user."""
+    emails = [normalize_email(email) for email in emails]
+    existing: Set[str] = set()
+    for start in range(0, len(emails), IN_CHUNK_SIZE):
+        chunk = emails[start:start + IN_CHUNK_SIZE]
+        existing.update(db.execute(
+            select(User.email_normalized).where(User.email_normalized.in_(chunk))
+        ).scalars())
+    return existing
+
+
+def create_users_bulk(db: Session, rows: List[Dict[str, str]]) -> List[User]:
+    """Insert many users with one executemany.
+
+    ``rows`` hold ``name``, ``email`` and ``hashed_password``. Returns the
+    created users (with ids and timestamps) read back in one pass.
+    """
+    if not rows:
+        return []
+    db.connection().execute(
+        insert(User.__table__),
+        [dict(row, email_normalized=normalize_email(row["email"])) for row in rows],
+    )
+    for row in rows:
+        principal_cache.invalidate(row["email"])
+    return get_users_by_emails(db, [row["email"] for row in rows])
+
+
+def create_user(db: Session, name: str, email: str, hashed_password: str) -> User:
+    user = User(name=name, email=email, email_normalized=normalize_email(email),
+                hashed_password=hashed_password)
+    db.add(user)
+    db.flush()
+    principal_cache.invalidate(user.email)
+    return user
+
+
+def update_password_hash(db: Session, user_id: int, hashed_password: str) -> None:
+    db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+
+
+def create_api_key(db: Session, user_id: int, name: str, prefix: str, secret_digest: str) -> ApiKey:
+    api_key = ApiKey(user_id=user_id, name=name, prefix=prefix, secret_digest=secret_digest)
+    db.add(api_key)
+    db.flush()
+    return api_key
+
+
+def get_api_keys(db: Session, user_id: int) -> List[ApiKey]:
+    """All keys of a user, revoked ones included, oldest first."""
+    return list(db.execute(
+        select(ApiKey).where(ApiKey.user_id == user_id).order_by(ApiKey.id)
+    ).scalars())
+
+
+def get_active_api_key(db: Session, prefix: str) -> Optional[Tuple[ApiKey, User]]:
+    """The unrevoked key with ``prefix`` and its owner, via the prefix index."""
+    row = db.execute(
+        select(ApiKey, User)
+        .join(User, ApiKey.user_id == User.id)
+        .where(ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None))
+    ).one_or_none()
+    return (row[0], row[1]) if row else None
+
+
+def get_recent_active_api_keys(db: Session, limit: int) -> List[Tuple[ApiKey, User]]:
+    """The ``limit`` newest unrevoked keys with their owners."""
+    rows = db.execute(
+        select(ApiKey, User)
+        .join(User, ApiKey.user_id == User.id)
+        .where(ApiKey.revoked_at.is_(None))
+        .order_by(ApiKey.id.desc())
+        .limit(limit)
+    ).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def revoke_api_key(db: Session, user_id: int, key_id: int) -> Optional[ApiKey]:
+    """Mark a user's key revoked; None if it doesn't exist or is revoked already."""
+    api_key = db.execute(
+        select(ApiKey).where(
+            ApiKey.id == key_id, ApiKey.user_id == user_id, ApiKey.revoked_at.is_(None)
+        )
+    ).scalar_one_or_none()
+    if api_key is None:
+        return None
+    api_key.revoked_at = datetime.now(timezone.utc)
+    db.flush()
+    return api_key
+
+
+def revoke_token(db: Session, jti: str, expires_at: int) -> None:
+    if db.get(RevokedToken, jti) is None:
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        db.flush()
+
+
+def get_revoked_tokens(db: Session, now: int) -> Dict[str, int]:
+    """``jti -> exp`` of revocations whose token has not expired yet."""
+    rows = db.execute(
+        select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+    )
+    return {jti: expires_at for jti, expires_at in rows}
+
+
+def delete_expired_revocations(db: Session, now: int) -> int:
+    """Drop revocations of tokens that have expired anyway; returns the row count."""
+    return db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now)).rowcount
+
+
+def create_refresh_session(db: Session, user_id: int, family_id: str, token_hash: str,
+                           expires_at: int) -> RefreshSession:
+    session = RefreshSession(user_id=user_id, family_id=family_id, token_hash=token_hash,
+                             expires_at=expires_at)
+    db.add(session)
+    db.flush()
+    return session
+
+
+def rotate_refresh_session(db: Session, token_hash: str, new_token_hash: str, now: int,
+                           expires_at: int) -> Tuple[str, Optional[User]]:
+    """Replace a refresh token with a new one in the same family.
+
+    Returns ``("rotated", user)`` on success, ``("reused", user)`` when the
+    token was already rotated (the whole family is revoked then, since one
+    of the two holders is not the legitimate client), and
+    ``("invalid", None)`` for unknown, expired or revoked tokens.
+    """
+    row = db.execute(
+        select(RefreshSession, User)
+        .join(User, RefreshSession.user_id == User.id)
+        .where(RefreshSession.token_hash == token_hash)
+    ).one_or_none()
+    if row is None:
+        return "invalid", None
+    session, user = row
+    if session.revoked_at is not None or session.expires_at <= now:
+        return "invalid", None
+    if session.rotated_at is not None:
+        revoke_refresh_family(db, session.family_id, now)
+        return "reused", user
+    session.rotated_at = now
+    create_refresh_session(db, user.id, session.family_id, new_token_hash, expires_at)
+    return "rotated", user
+
+
+def revoke_refresh_family(db: Session, family_id: str, now: int) -> None:
+    db.execute(
+        update(RefreshSession)
+        .where(RefreshSession.family_id == family_id, RefreshSession.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+
+
+def revoke_refresh_session(db: Session, token_hash: str, now: int) -> bool:
+    """End the login session a refresh token belongs to; False if the token is unknown."""
+    family_id = db.execute(
+        select(RefreshSession.family_id).where(RefreshSession.token_hash == token_hash)
+    ).scalar_one_or_none()
+    if family_id is None:
+        return False
+    revoke_refresh_family(db, family_id, now)
+    return True
+
+
+def delete_expired_sessions(db: Session, now: int) -> int:
+    return db.execute(delete(RefreshSession).where(RefreshSession.expires_at <= now)).rowcount
+
+
+def user_to_dict(user: User) -> Dict[str, Any]:
+    """Public fields of a user as a plain dict (the API serves ``UserResponse``)."""
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "created_at": user.created_at,
+    }
@@ -1,21 +1,196 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from typing import Any, Callable, TypeVar, Union
 
-# SQLite database (you can change to PostgreSQL/MySQL later)
-DATABASE_URL = "sqlite:///./users.db"
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+from config import settings
+from metrics import ENABLED as METRICS_ENABLED, instrument_engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DATABASE_URL = settings.database_url
+ASYNC_MODE = settings.db_mode == "async"
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+T = TypeVar("T")
+DbSession = Union[Session, AsyncSession]
+
+
+def _connect_args(url: str) -> dict:
+    if not url.startswith("sqlite"):
+        return {}
+    # cached_statements sizes the driver's prepared-statement cache per connection
+    return {"check_same_thread": False, "cached_statements": settings.sqlite_statement_cache_size}
+
+
+def _engine_kwargs(url: str) -> dict:
+    kwargs: dict = {"query_cache_size": settings.db_query_cache_size}
+    # In-memory SQLite gets a single shared connection; pool sizing doesn't apply
+    if ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+aiosqlite:"):
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_pool_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return kwargs
+
+
+def sqlite_pragmas(read_only: bool = False) -> dict:
+    """The connection profile applied to every new SQLite connection."""
+    if not settings.sqlite_tuning:
+        return {"busy_timeout": int(settings.sqlite_busy_timeout_ms)}
+    pragmas = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "cache_size": -int(settings.sqlite_cache_size_kib),
+        "mmap_size": int(settings.sqlite_mmap_size),
+        "temp_store": settings.sqlite_temp_store,
+        "busy_timeout": int(settings.sqlite_busy_timeout_ms),
+    }
+    if read_only:
+        # Refuse writes on connections that only serve GET endpoints
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def configure_sqlite(engine: Engine, read_only: bool = False) -> Engine:
+    """Apply the connection profile to each connection ``engine`` opens.
+
+    Works for sync engines and for ``AsyncEngine.sync_engine``.
+    """
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _apply_profile(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+
+def _sync_engine(read_only: bool) -> Engine:
+    engine = create_engine(DATABASE_URL, connect_args=_connect_args(DATABASE_URL),
+                           **_engine_kwargs(DATABASE_URL))
+    if IS_SQLITE:
+        configure_sqlite(engine, read_only)
+    if METRICS_ENABLED:
+        instrument_engine(engine, "read" if read_only else "primary")
+    return engine
+
+
+def _async_engine(read_only: bool):
+    engine = create_async_engine(
+        async_url(DATABASE_URL), connect_args=_connect_args(DATABASE_URL),
+        **_engine_kwargs(DATABASE_URL),
+    )
+    if IS_SQLITE:
+        configure_sqlite(engine.sync_engine, read_only)
+    if METRICS_ENABLED:
+        instrument_engine(engine.sync_engine, "read" if read_only else "primary")
+    return engine
+
+
+def async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    return url
+
+
+# The sync engine is always available: schema creation and tooling use it,
+# and it serves requests when AUTH_DB_MODE=sync. With the single writer
+# enabled (writer.py) request sessions only read; writes use the writer's
+# own connection. GET endpoints use the read-only pools.
+engine = _sync_engine(read_only=False)
+read_engine = _sync_engine(read_only=True) if not ASYNC_MODE else None
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=read_engine
+) if not ASYNC_MODE else None
+
+async_engine = _async_engine(read_only=False) if ASYNC_MODE else None
+async_read_engine = _async_engine(read_only=True) if ASYNC_MODE else None
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+) if ASYNC_MODE else None
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, autoflush=False, expire_on_commit=False
+) if ASYNC_MODE else None
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+async def _request_session(read_only: bool):
+    if ASYNC_MODE:
+        async with (AsyncReadSessionLocal if read_only else AsyncSessionLocal)() as db:
+            yield db
+        return
+
+    db = (ReadSessionLocal if read_only else SessionLocal)()
     try:
         yield db
     finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_db():
+    """Yield a request-scoped session for the configured engine mode."""
+    async for db in _request_session(read_only=False):
+        yield db
+
+
+async def get_read_db():
+    """Like ``get_db`` but from the read-only pool, for GET endpoints."""
+    async for db in _request_session(read_only=True):
+        yield db
+
+
+async def dispose_engines() -> None:
+    for sync_engine in (engine, read_engine):
+        if sync_engine is not None:
+            sync_engine.dispose()
+    for aengine in (async_engine, async_read_engine):
+        if aengine is not None:
+            await aengine.dispose()
+
+
+def _ping_sync(sync_engine: Engine) -> None:
+    with sync_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def ping(read_only: bool = False) -> None:
+    """Run ``SELECT 1`` on a pooled connection; raises if the database is unreachable."""
+    if ASYNC_MODE:
+        async with (async_read_engine if read_only else async_engine).connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    else:
+        await run_in_threadpool(_ping_sync, read_engine if read_only else engine)
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any) -> T:
+    """Run ``fn(session, *args)`` against either kind of session.
+
+    Query code is written once against the sync ``Session`` API. An
+    ``AsyncSession`` runs it through ``run_sync`` on the asyncio driver, so no
+    thread is held while SQLite works; a sync session runs it in the
+    threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+async def release_db(db: DbSession) -> None:
+    """Return the session's pooled connection; loaded attributes stay readable."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
         db.close()
@@ -0,0 +1,167 @@
+"""Password hashing algorithms behind ``auth.hash_password``/``verify_password``.
+
+A ``Hasher`` creates hashes with its own parameters and recognizes its
+stored format, so verification works for every algorithm a database may
+still contain while new hashes use the configured one:
+
+* ``BcryptHasher``: ``$2b$<cost>$...``; the cost only buys CPU time.
+* ``Argon2idHasher``: ``$argon2id$v=19$m=...,t=...,p=...$...``; memory,
+  time and parallelism are tuned separately, so an attacker's GPU/ASIC
+  pays in memory too. ``ARGON2_PROFILES`` holds the named settings.
+
+``needs_rehash`` is true for hashes of another algorithm or with other
+parameters; ``/login`` upgrades those with the just-verified password.
+Hasher instances are small and picklable, so they can be shipped to a
+process-pool worker together with the work.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import bcrypt
+from argon2 import PasswordHasher as _Argon2
+from argon2 import Type
+from argon2.exceptions import InvalidHashError, VerificationError, VerifyMismatchError
+
+# bcrypt only looks at the first 72 bytes of a password
+BCRYPT_MAX_BYTES = 72
+
+# Argon2id settings: time_cost (passes), memory_cost (KiB), parallelism (lanes)
+ARGON2_PROFILES: Dict[str, Dict[str, int]] = {
+    # OWASP Password Storage Cheat Sheet minimum
+    "owasp": {"time_cost": 2, "memory_cost": 19 * 1024, "parallelism": 1},
+    # libsodium's "interactive" limits
+    "interactive": {"time_cost": 2, "memory_cost": 64 * 1024, "parallelism": 1},
+    # RFC 9106 second recommendation (first choice when memory is limited)
+    "rfc9106-low-memory": {"time_cost": 3, "memory_cost": 64 * 1024, "parallelism": 4},
+    # Hosts with memory to spare and few concurrent logins
+    "moderate": {"time_cost": 3, "memory_cost": 256 * 1024, "parallelism": 2},
+}
+
+
+class Hasher(ABC):
+    """One password hashing algorithm with fixed parameters."""
+
+    name: str
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        """Hash ``password`` with this hasher's parameters."""
+
+    @abstractmethod
+    def verify(self, password: str, hashed: str) -> bool:
+        """Check ``password`` against a hash in this hasher's format."""
+
+    @abstractmethod
+    def identifies(self, hashed: str) -> bool:
+        """True when ``hashed`` is in this hasher's format."""
+
+    @abstractmethod
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when ``hashed`` (in this format) has other parameters."""
+
+    @property
+    def params(self) -> Dict[str, int]:
+        return {}
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{type(self).__name__}({params})"
+
+
+class BcryptHasher(Hasher):
+    name = "bcrypt"
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
+    @property
+    def params(self) -> Dict[str, int]:
+        return {"rounds": self.rounds}
+
+    @staticmethod
+    def _password_bytes(password: str) -> bytes:
+        return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+    def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(self.rounds)
+        return bcrypt.hashpw(self._password_bytes(password), salt).decode("utf-8")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return bcrypt.checkpw(self._password_bytes(password), hashed.encode("utf-8"))
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    @staticmethod
+    def rounds_of(hashed: str) -> Optional[int]:
+        """Cost factor of a stored ``$2b$12$...`` hash, None if it isn't bcrypt."""
+        parts = hashed.split("$")
+        if len(parts) == 4 and parts[1] in ("2a", "2b", "2y") and parts[2].isdigit():
+            return int(parts[2])
+        return None
+
+    def identifies(self, hashed: str) -> bool:
+        return self.rounds_of(hashed) is not None
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return self.rounds_of(hashed) != self.rounds
+
+
+class Argon2idHasher(Hasher):
+    name = "argon2id"
+
+    def __init__(self, time_cost: int, memory_cost: int, parallelism: int):
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+        self._hasher = _Argon2(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism, type=Type.ID,
+        )
+
+    @classmethod
+    def from_profile(cls, profile: str, **overrides: Optional[int]) -> "Argon2idHasher":
+        if profile not in ARGON2_PROFILES:
+            raise ValueError(f"Unknown Argon2 profile {profile!r}; choose from {sorted(ARGON2_PROFILES)}")
+        params = dict(ARGON2_PROFILES[profile])
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**params)
+
+    @property
+    def params(self) -> Dict[str, int]:
+        return {"time_cost": self.time_cost, "memory_cost": self.memory_cost,
+                "parallelism": self.parallelism}
+
+    def __reduce__(self):
+        # The argon2-cffi hasher is rebuilt from the parameters on unpickling
+        return (type(self), (self.time_cost, self.memory_cost, self.parallelism))
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self._hasher.verify(hashed, password)
+        except (VerifyMismatchError, VerificationError, InvalidHashError):
+            return False
+
+    def identifies(self, hashed: str) -> bool:
+        return hashed.startswith("$argon2")
+
+    def needs_rehash(self, hashed: str) -> bool:
+        try:
+            return self._hasher.check_needs_rehash(hashed)
+        except InvalidHashError:
+            return True
+
+
+# Any instance can verify any hash of its format (parameters are in the hash)
+_VERIFIERS: List[Hasher] = [BcryptHasher(), Argon2idHasher.from_profile("owasp")]
+
+
+def hasher_for(hashed: str, preferred: Optional[Hasher] = None) -> Optional[Hasher]:
+    """The hasher that understands ``hashed`` (``preferred`` first), or None."""
+    for hasher in ([preferred] if preferred else []) + _VERIFIERS:
+        if hasher.identifies(hashed):
+            return hasher
+    return None
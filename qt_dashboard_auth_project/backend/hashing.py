@@ -0,0 +1,175 @@
+"""Dedicated executor for password hashing.
+
+bcrypt deliberately burns ~250 ms of CPU per call. Running it inline in a
+request handler holds one of uvicorn's threadpool slots for that long, so a
+burst of logins starves cheap endpoints such as ``/verify`` and ``/``.
+
+Hashing runs on its own pool instead. bcrypt releases the GIL, so the default
+thread pool scales with cores; a process pool can be selected with
+``AUTH_HASH_EXECUTOR=process``. At most ``hash_workers + hash_queue_size``
+jobs may be in flight; beyond that ``HashingQueueFull`` is raised right away
+instead of letting the backlog (and everyone's latency) grow.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from auth import get_hasher, verify_password
+from config import settings
+from metrics import HASH_LATENCY
+
+_HASH_LATENCY = HASH_LATENCY.labels("hash")
+_VERIFY_LATENCY = HASH_LATENCY.labels("verify")
+
+
+class HashingQueueFull(Exception):
+    """Raised when the hashing executor already holds its maximum backlog."""
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[float, Any]:
+    """Run ``fn`` in the worker and report its own duration, without queue wait.
+
+    Module-level so it can be pickled to a process pool; the parent records
+    the duration, since a worker process has its own (unscraped) registry.
+    """
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+class HashingExecutor:
+    """Size-bounded pool for CPU-heavy password hashing."""
+
+    def __init__(self, workers: int, queue_size: int, kind: str = "thread"):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.kind = kind
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pool: Executor
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hasher")
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs currently running or waiting for a worker."""
+        return self._in_flight
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Schedule ``fn(*args)`` on the pool or raise ``HashingQueueFull``."""
+        if not self._slots.acquire(blocking=False):
+            raise HashingQueueFull("Password hashing queue is full")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def map(self, fn: Callable[..., Any], arg_tuples: Sequence[tuple],
+                  window: Optional[int] = None) -> List[Any]:
+        """Run ``fn(*args)`` for every tuple, at most ``window`` at a time.
+
+        Meant for bulk jobs: when the shared queue is full the batch waits
+        for room instead of failing, so interactive requests keep priority.
+        """
+        limit = asyncio.Semaphore(window or self.workers)
+
+        async def one(args: tuple) -> Any:
+            async with limit:
+                while True:
+                    try:
+                        return await self.run(fn, *args)
+                    except HashingQueueFull:
+                        await asyncio.sleep(0.05)
+
+        return await asyncio.gather(*(one(args) for args in arg_tuples))
+
+    async def _run_timed(self, histogram, fn: Callable[..., Any], *args: Any) -> Any:
+        elapsed, result = await self.run(_timed, fn, *args)
+        histogram.observe(elapsed)
+        return result
+
+    # The hasher travels with the job: process workers don't see the
+    # parent's calibrated/configured one
+    async def hash_password(self, password: str) -> str:
+        return await self._run_timed(_HASH_LATENCY, get_hasher().hash, password)
+
+    async def hash_passwords(self, passwords: Sequence[str]) -> List[str]:
+        hash_fn = get_hasher().hash
+        results = await self.map(_timed, [(hash_fn, p) for p in passwords])
+        for elapsed, _ in results:
+            _HASH_LATENCY.observe(elapsed)
+        return [hashed for _, hashed in results]
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run_timed(_VERIFY_LATENCY, verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[HashingExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> HashingExecutor:
+    """Return the process-wide hashing executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = HashingExecutor(
+                    workers=settings.hash_workers,
+                    queue_size=settings.hash_queue_size,
+                    kind=settings.hash_executor,
+                )
+    return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the dedicated hashing executor."""
+    return await get_executor().hash_password(password)
+
+
+async def hash_passwords_async(passwords: Sequence[str]) -> List[str]:
+    """Hash many passwords in parallel on the dedicated hashing executor."""
+    return await get_executor().hash_passwords(passwords)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the dedicated hashing executor."""
+    return await get_executor().verify_password(plain_password, hashed_password)
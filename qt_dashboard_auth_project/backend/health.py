@@ -0,0 +1,86 @@
+"""Liveness and readiness checks behind ``/livez`` and ``/readyz``.
+
+``/livez`` only proves the event loop answers and does no I/O. ``/readyz``
+says whether this process should get traffic:
+
+* ``warmup``: the start-up warm-up (``warmup.py``) has finished;
+* ``database``: ``SELECT 1`` on a pooled read connection succeeds within
+  ``readiness_db_timeout`` seconds;
+* ``hashing``: the hashing executor is below ``readiness_max_hash_load``
+  of its capacity (workers plus queue), i.e. a login would not be shed.
+
+The result is reused for ``readiness_cache_seconds`` and concurrent probes
+share one evaluation, so however often load balancers and the launcher
+poll, the database sees at most one ping per interval.
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+import database
+import warmup
+from config import settings
+from hashing import get_executor
+
+Checks = Dict[str, str]
+
+
+async def ping_database(timeout: float) -> None:
+    """Raise unless ``SELECT 1`` on the read pool answers within ``timeout``."""
+    await asyncio.wait_for(database.ping(read_only=True), timeout)
+
+
+def hashing_load() -> float:
+    """Jobs in flight on the hashing executor, as a fraction of its capacity."""
+    stats = get_executor().stats()
+    return stats["in_flight"] / (stats["workers"] + stats["queue_size"])
+
+
+class ReadinessProbe:
+    """Evaluates the readiness checks, reusing a result for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, db_timeout: float, max_hash_load: float):
+        self.ttl = ttl
+        self.db_timeout = db_timeout
+        self.max_hash_load = max_hash_load
+        self._lock = asyncio.Lock()
+        self._result: Optional[Tuple[bool, Checks]] = None
+        self._checked_at = 0.0
+        self.evaluations = 0
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < self.ttl
+
+    async def check(self) -> Tuple[bool, Checks]:
+        """``(ready, {check: "ok" or the reason it failed})``."""
+        if not warmup.state.ready:
+            # Not cached: readiness turns green as soon as warm-up ends
+            return False, {"warmup": "running"}
+        if self._fresh():
+            return self._result
+        async with self._lock:
+            if not self._fresh():
+                self._result = await self._evaluate()
+                self._checked_at = time.monotonic()
+        return self._result
+
+    async def _evaluate(self) -> Tuple[bool, Checks]:
+        self.evaluations += 1
+        checks: Checks = {"warmup": "ok"}
+        try:
+            await ping_database(self.db_timeout)
+            checks["database"] = "ok"
+        except asyncio.TimeoutError:
+            checks["database"] = f"no answer within {self.db_timeout:g}s"
+        except Exception as exc:
+            checks["database"] = f"error: {exc.__class__.__name__}"
+        load = hashing_load()
+        checks["hashing"] = "ok" if load < self.max_hash_load else f"saturated ({load:.0%} of capacity)"
+        return all(value == "ok" for value in checks.values()), checks
+
+
+readiness = ReadinessProbe(
+    ttl=settings.readiness_cache_seconds,
+    db_timeout=settings.readiness_db_timeout,
+    max_hash_load=settings.readiness_max_hash_load,
+)
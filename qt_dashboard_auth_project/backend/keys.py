@@ -0,0 +1,253 @@
+"""Asymmetric signing keys for access tokens, with rotation and JWKS export.
+
+With ``AUTH_JWT_ALGORITHM`` set to ``EdDSA`` or ``ES256`` tokens are signed
+with a private key and carry its ``kid``; the matching public keys are
+published on ``/.well-known/jwks.json`` so clients can verify tokens offline.
+
+Keys are stored as PEM files in ``AUTH_JWT_KEY_DIR`` (one ``<kid>.pem`` per
+key). The newest key signs; it is replaced once it is older than
+``AUTH_JWT_KEY_ROTATION_DAYS``. Retired keys stay published (and accepted)
+so that tokens signed shortly before a rotation remain valid until expiry.
+
+Worker processes sharing the key dir agree on one signing key: a rotation
+takes an exclusive lock on the dir and re-reads it, and a fresh key that
+another process wrote meanwhile is adopted instead of generating a new
+one. A retired key is only deleted once every token it can have signed
+has expired (and never among the ``AUTH_JWT_KEYS_RETAINED`` newest). A
+token with an unknown ``kid`` that exists on disk triggers an immediate
+re-read.
+"""
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+from config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# How long a served JWKS document is reused before the key dir is re-read
+JWKS_REFRESH_SECONDS = 60.0
+# Kept beyond the token lifetime before a retired key is deleted
+RETIRE_GRACE_SECONDS = 300.0
+LOCK_FILE = ".lock"
+_KID = re.compile(r"\d+-[0-9a-f]{8}")
+
+
+class SigningKey:
+    __slots__ = ("kid", "created_at", "private_key", "public_key")
+
+    def __init__(self, kid: str, created_at: float, private_key: Any):
+        self.kid = kid
+        self.created_at = created_at
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+
+
+def _generate(algorithm: str) -> Any:
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def _public_jwk(key: SigningKey, algorithm: str) -> Dict[str, Any]:
+    codec = ECAlgorithm if algorithm == "ES256" else OKPAlgorithm
+    jwk = codec.to_jwk(key.public_key, as_dict=True)
+    jwk.update({"kid": key.kid, "alg": algorithm, "use": "sig"})
+    return jwk
+
+
+@contextmanager
+def _dir_lock(key_dir: Path):
+    """Exclusive lock on ``key_dir``, held across worker processes."""
+    key_dir.mkdir(parents=True, exist_ok=True)
+    with open(key_dir / LOCK_FILE, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class KeyStore:
+    """Signing key ring backed by a directory of PEM files."""
+
+    def __init__(self, algorithm: str, key_dir: Optional[str], rotation_seconds: float,
+                 retained: int, token_lifetime: float):
+        self.algorithm = algorithm
+        self.key_dir = Path(key_dir) if key_dir else None
+        self.rotation_seconds = rotation_seconds
+        self.retained = max(1, retained)
+        self.token_lifetime = token_lifetime
+        self._lock = threading.Lock()
+        self._keys: List[SigningKey] = []  # newest first
+        self._jwks: Optional[Tuple[float, bytes]] = None
+        self._load()
+
+    def _load(self) -> None:
+        if self.key_dir is None:
+            return
+        keys = []
+        if self.key_dir.is_dir():
+            for path in self.key_dir.glob("*.pem"):
+                try:
+                    created_at = float(path.stem.split("-", 1)[0])
+                    private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+                except FileNotFoundError:
+                    continue  # retired by another worker meanwhile
+                except (ValueError, TypeError):
+                    logger.warning("Ignoring unreadable signing key %s", path)
+                    continue
+                keys.append(SigningKey(path.stem, created_at, private_key))
+        keys.sort(key=lambda k: k.created_at, reverse=True)
+        self._keys = keys
+        self._jwks = None
+
+    def _fresh(self, key: SigningKey) -> bool:
+        return time.time() - key.created_at < self.rotation_seconds
+
+    def _rotate(self) -> SigningKey:
+        now = time.time()
+        key = SigningKey(f"{int(now)}-{secrets.token_hex(4)}", now, _generate(self.algorithm))
+        if self.key_dir is not None:
+            try:
+                self.key_dir.mkdir(parents=True, exist_ok=True)
+                # Written aside and renamed, so other workers never read half a key
+                tmp = self.key_dir / f".{key.kid}.tmp"
+                fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(key.private_key.private_bytes(
+                        serialization.Encoding.PEM,
+                        serialization.PrivateFormat.PKCS8,
+                        serialization.NoEncryption(),
+                    ))
+                os.replace(tmp, self.key_dir / f"{key.kid}.pem")
+            except OSError:
+                logger.exception("Could not persist signing key; keeping it in memory only")
+        logger.info("Rotated token signing key, new kid=%s", key.kid)
+        self._keys = [key] + self._keys
+        self._retire(now)
+        self._jwks = None
+        return key
+
+    def _retire(self, now: float) -> None:
+        """Drop retired keys that no unexpired token can have been signed with.
+
+        A key stops signing once its successor exists, so its tokens have all
+        expired ``token_lifetime`` after the successor was created.
+        """
+        kept = self._keys[: self.retained + 1]
+        for successor, key in zip(self._keys[self.retained:], self._keys[self.retained + 1:]):
+            if now - successor.created_at < self.token_lifetime + RETIRE_GRACE_SECONDS:
+                kept.append(key)
+            elif self.key_dir is not None:
+                (self.key_dir / f"{key.kid}.pem").unlink(missing_ok=True)
+        self._keys = kept
+
+    def signing_key(self) -> SigningKey:
+        """The key new tokens are signed with, rotated when it is due.
+
+        A due rotation first re-reads the key dir under the dir lock, so a
+        key another worker process has just written is used instead.
+        """
+        keys = self._keys
+        if keys and self._fresh(keys[0]):
+            return keys[0]
+        with self._lock:
+            keys = self._keys
+            if keys and self._fresh(keys[0]):
+                return keys[0]
+            if self.key_dir is None:
+                return self._rotate()
+            try:
+                with _dir_lock(self.key_dir):
+                    self._load()
+                    if self._keys and self._fresh(self._keys[0]):
+                        return self._keys[0]
+                    return self._rotate()
+            except OSError:
+                logger.exception("Could not lock the signing key dir %s", self.key_dir)
+                return self._rotate()
+
+    def _on_disk(self, kid: str) -> bool:
+        return (self.key_dir is not None and _KID.fullmatch(kid) is not None
+                and (self.key_dir / f"{kid}.pem").is_file())
+
+    def public_key(self, kid: str) -> Optional[Any]:
+        """Public key for ``kid``.
+
+        A kid that is not loaded yet but has a file in the key dir (another
+        worker rotated) triggers a re-read; any other unknown kid costs one
+        ``stat``.
+        """
+        for key in self._keys:
+            if key.kid == kid:
+                return key.public_key
+        if not self._on_disk(kid):
+            return None
+        with self._lock:
+            self._load()
+        for key in self._keys:
+            if key.kid == kid:
+                return key.public_key
+        return None
+
+    def jwks(self) -> bytes:
+        """Serialized JWK Set of all published keys, cached between refreshes."""
+        cached = self._jwks
+        if cached is not None and time.monotonic() - cached[0] < JWKS_REFRESH_SECONDS:
+            return cached[1]
+        self.signing_key()
+        with self._lock:
+            if cached is not None:
+                self._load()
+            body = json.dumps(
+                {"keys": [_public_jwk(k, self.algorithm) for k in self._keys]},
+                separators=(",", ":"),
+            ).encode("utf-8")
+            self._jwks = (time.monotonic(), body)
+        return body
+
+
+_store: Optional[KeyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_key_store() -> KeyStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from auth import ACCESS_TOKEN_EXPIRE_MINUTES
+                _store = KeyStore(
+                    algorithm=settings.jwt_algorithm,
+                    key_dir=settings.jwt_key_dir,
+                    rotation_seconds=settings.jwt_key_rotation_days * 86400,
+                    retained=settings.jwt_keys_retained,
+                    token_lifetime=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+                )
+    return _store
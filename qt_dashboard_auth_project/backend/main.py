@@ -1,21 +1,111 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from datetime import timedelta
+import asyncio
+import secrets
+import time
+from typing import List, Optional
 import logging
 
-from database import engine, get_db, Base
-from models import User
-from schemas import UserRegister, UserLogin, TokenResponse, VerifyTokenResponse, UserResponse
-from auth import hash_password, verify_password, create_access_token, verify_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from database import (
+    engine, dispose_engines, get_db, get_read_db, run_db, release_db, DbSession, SessionLocal,
+)
+import crud
+from writer import SINGLE_WRITER, get_writer, run_write, stop_writer
+from cache import api_key_cache, principal_cache
+from schemas import (
+    UserRegister, UserLogin, TokenResponse, VerifyTokenResponse, UserResponse,
+    VerifyBatchRequest, VerifyBatchResponse, VerifyBatchResult,
+    RegisterBatchRequest, RegisterBatchResponse, RegisterBatchResult,
+    ApiKeyCreate, ApiKeyInfo, ApiKeyIssued, RefreshRequest, LogoutRequest,
+)
+from auth import (
+    create_access_token, verify_token_cached, token_cache_stats, jwks_document,
+    create_refresh_token, refresh_token_digest,
+    calibrate_bcrypt_rounds, get_hasher, set_hasher, needs_rehash, ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from hashers import BcryptHasher
+from hashing import (
+    HashingQueueFull, get_executor, hash_password_async, hash_passwords_async,
+    verify_password_async, shutdown_executor,
+)
+import admission
+import apikeys
+from admission import hash_admission, ip_limiter, email_limiter
+import metrics
+import warmup
+from migrations import migrate
+from health import readiness
+from revocation import revocations
+from config import settings
+from timing import ServerTimingMiddleware, TimedJSONResponse, span
+from responses import model_response
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+async def sweep_expired() -> None:
+    """Delete expired revocations and sessions; reload revocations into memory."""
+    now = int(time.time())
+    with SessionLocal() as db:
+        removed = await run_write(db, crud.delete_expired_revocations, now)
+        sessions = await run_write(db, crud.delete_expired_sessions, now)
+        revocations.replace(await run_db(db, crud.get_revoked_tokens, now))
+    if removed or sessions:
+        logger.info("Swept %d expired token revocations and %d refresh sessions", removed, sessions)
+
+
+async def expiry_sweeper(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sweep_expired()
+        except Exception:
+            logger.exception("Expiry sweep failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One PRAGMA read when the schema is current
+    await run_in_threadpool(migrate, engine)
+    if isinstance(get_hasher(), BcryptHasher) and settings.bcrypt_rounds is None:
+        rounds = await run_in_threadpool(
+            calibrate_bcrypt_rounds, settings.bcrypt_budget_ms,
+            settings.bcrypt_min_rounds, settings.bcrypt_max_rounds,
+        )
+        set_hasher(BcryptHasher(rounds))
+        logger.info("bcrypt cost %d fits the %.0f ms budget", rounds, settings.bcrypt_budget_ms)
+    logger.info("New password hashes use %r", get_hasher())
+    await sweep_expired()
+    sweeper = asyncio.create_task(expiry_sweeper(settings.revocation_sweep_seconds))
+    # Serving starts right away; /readyz turns green once warm-up is done
+    warming = asyncio.create_task(warmup.warm_up()) if settings.warmup_enabled else None
+    if warming is None:
+        warmup.finish()
+    yield
+    tasks = [task for task in (warming, sweeper) if task is not None]
+    for task in tasks:
+        task.cancel()
+    # Let them close their connections before the pools are disposed
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_executor(wait=False)
+    stop_writer(timeout=10)
+    await dispose_engines()
+
+
+app = FastAPI(
+    title="Auth API", version="1.0.0", lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
+)
 
-app = FastAPI(title="Auth API", version="1.0.0")
+if settings.server_timing:
+    app.add_middleware(ServerTimingMiddleware, slow_request_ms=settings.slow_request_ms)
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # Enable CORS for frontend to communicate with backend
 app.add_middleware(
@@ -27,117 +117,465 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(HashingQueueFull)
+async def hashing_queue_full_handler(request: Request, exc: HashingQueueFull):
+    """Tell clients to back off instead of queueing behind a hashing backlog."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def authorization_credentials(request: Request, scheme: str) -> Optional[str]:
+    """Credentials of an ``Authorization: <scheme> <credentials>`` header, if present."""
+    name, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if name.lower() != scheme.lower() or not credentials.strip():
+        return None
+    return credentials.strip()
+
+
+def unauthorized(detail: str, scheme: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": scheme},
+    )
+
+
+def cache_principal(user) -> UserResponse:
+    """Public info of a ``User`` row, validated once and cached for /verify."""
+    principal = UserResponse.model_validate(user)
+    principal_cache.set(principal.email, principal)
+    return principal
+
+
+async def principal_for_email(db: DbSession, email: str) -> Optional[UserResponse]:
+    """Public user info from the principal cache, else one indexed lookup."""
+    principal = principal_cache.get(email)
+    if principal is None:
+        with span("db"):
+            user = await run_db(db, crud.get_user_by_email, email)
+        if not user:
+            return None
+        principal = cache_principal(user)
+    return principal
+
+
+async def bearer_principal(request: Request, db: DbSession = Depends(get_read_db)) -> UserResponse:
+    """Dependency: the user of an ``Authorization: Bearer <jwt>`` header."""
+    token = authorization_credentials(request, "Bearer")
+    if token is None:
+        raise unauthorized("Bearer token required", "Bearer")
+    with span("jwt"):
+        payload = verify_token_cached(token)
+    if payload is None:
+        raise unauthorized("Invalid or expired token", "Bearer")
+    principal = await principal_for_email(db, payload["email"])
+    if principal is None:
+        raise unauthorized("User not found", "Bearer")
+    return principal
+
+
+async def api_key_principal(request: Request, db: DbSession = Depends(get_read_db)) -> UserResponse:
+    """Dependency: the owner of an ``Authorization: ApiKey <key>`` header.
+
+    One prefix-index lookup (skipped on a cache hit) and one HMAC, no bcrypt.
+    """
+    key = authorization_credentials(request, "ApiKey")
+    parsed = apikeys.parse_key(key) if key else None
+    if parsed is None:
+        raise unauthorized("API key required", "ApiKey")
+    prefix, secret = parsed
+
+    entry = api_key_cache.get(prefix)
+    if entry is None:
+        with span("db"):
+            found = await run_db(db, crud.get_active_api_key, prefix)
+        if found is not None:
+            entry = apikeys.cache_entry(*found)
+            api_key_cache.set(prefix, entry)
+    with span("hash"):
+        valid = apikeys.secret_matches(secret, entry["digest"] if entry else None)
+    if not valid:
+        raise unauthorized("Invalid or revoked API key", "ApiKey")
+    return entry["user"]
+
+
+async def current_principal(request: Request, db: DbSession = Depends(get_read_db)) -> UserResponse:
+    """Dependency accepting either a bearer token or an API key."""
+    if authorization_credentials(request, "ApiKey") is not None:
+        return await api_key_principal(request, db)
+    return await bearer_principal(request, db)
+
+
+def refresh_expiry(now: int) -> int:
+    return now + int(settings.refresh_token_days * 86400)
+
+
+def token_response(principal: UserResponse, refresh_token: str) -> Response:
+    """A new access token for ``principal`` next to the given refresh token."""
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    with span("jwt"):
+        access_token = create_access_token(
+            data={"sub": principal.email},
+            expires_delta=access_token_expires
+        )
+    return model_response(TokenResponse(
+        access_token=access_token,
+        token_type="bearer",
+        expires_in=int(access_token_expires.total_seconds()),
+        refresh_token=refresh_token,
+        user=principal,
+    ))
+
+
+async def upgrade_password_hash(db: DbSession, user, password: str) -> None:
+    """Re-hash a just-verified password with the current hasher and store it.
+
+    Best effort: if the server is too busy or the write fails, the old hash
+    keeps working and the upgrade is retried on the next login.
+    """
+    try:
+        with span("hash"):
+            async with hash_admission.admit():
+                new_hash = await hash_password_async(password)
+        with span("db"):
+            await run_write(db, crud.update_password_hash, user.id, new_hash)
+        metrics.PASSWORD_REHASHES.inc()
+    except Exception:
+        logger.warning("Could not upgrade the password hash of user %s", user.id, exc_info=True)
+
+
 @app.get("/")
 def read_root():
     """Health check endpoint."""
     return {"message": "Auth API is running"}
 
 
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the event loop answers; no I/O and no threadpool hop."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: warm-up done, database reachable, hashing not saturated."""
+    ready, checks = await readiness.check()
+    if not ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not_ready", "checks": checks},
+            headers={"Retry-After": "1"},
+        )
+    return {"status": "ready", "checks": checks}
+
+
+@app.get("/stats")
+def read_stats():
+    """Counters for admission control and the hashing executor."""
+    return {
+        "admission": admission.stats(),
+        "hashing": get_executor().stats(),
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache_stats(),
+        "api_key_cache": api_key_cache.stats(),
+        "revocations": revocations.stats(),
+        "warmup": warmup.state.stats(),
+        "writer": get_writer().stats() if SINGLE_WRITER else None,
+    }
+
+
+@metrics.REGISTRY.collector
+def _runtime_metrics():
+    """Expose the counters kept by caches, admission control and the writer."""
+    caches = {"principal": principal_cache.stats(), "token": token_cache_stats(),
+              "api_key": api_key_cache.stats()}
+    limits = admission.stats()
+    hashing = get_executor().stats()
+    families = [
+        ("auth_cache_hits_total", "counter", "Cache lookups served from memory",
+         [("", {"cache": name}, c["hits"]) for name, c in caches.items()]),
+        ("auth_cache_misses_total", "counter", "Cache lookups that fell through",
+         [("", {"cache": name}, c["misses"]) for name, c in caches.items()]),
+        ("auth_cache_entries", "gauge", "Entries currently cached",
+         [("", {"cache": name}, c["size"]) for name, c in caches.items()]),
+        ("auth_shed_requests_total", "counter", "Requests turned away before hashing",
+         [("", {"reason": "overloaded"}, limits["shed"]),
+          ("", {"reason": "rate_limited_ip"}, limits["ip_limiter"]["limited"]),
+          ("", {"reason": "rate_limited_email"}, limits["email_limiter"]["limited"])]),
+        ("auth_revoked_tokens", "gauge", "Revoked tokens not yet expired, held in memory",
+         [("", {}, len(revocations))]),
+        ("auth_revocation_filter_false_positives_total", "counter",
+         "Bloom filter matches for tokens that were not revoked",
+         [("", {}, revocations.false_positives)]),
+        ("auth_ready", "gauge", "1 once the start-up warm-up has finished",
+         [("", {}, int(warmup.state.ready))]),
+        ("auth_admission_waiting", "gauge", "Requests waiting for a hashing slot",
+         [("", {}, limits["waiting"])]),
+        ("auth_hash_in_flight", "gauge", "Hash jobs running or queued on the executor",
+         [("", {}, hashing["in_flight"])]),
+    ]
+    if SINGLE_WRITER:
+        writer = get_writer().stats()
+        families += [
+            ("auth_writer_commits_total", "counter", "Group commits by the single writer",
+             [("", {}, writer["commits"])]),
+            ("auth_writer_jobs_total", "counter", "Write jobs processed by the single writer",
+             [("", {}, writer["jobs"])]),
+            ("auth_writer_queued", "gauge", "Write jobs waiting for the writer",
+             [("", {}, writer["queued"])]),
+        ]
+    return families
+
+
+@app.get("/metrics")
+def read_metrics():
+    """Prometheus text exposition of latency histograms and counters."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/.well-known/jwks.json")
+def jwks():
+    """Public keys for verifying access tokens offline."""
+    return Response(
+        content=jwks_document(),
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=300"},
+    )
+
+
 @app.post("/register", response_model=UserResponse)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, request: Request, db: DbSession = Depends(get_db)):
     """Register a new user."""
     try:
+        ip_limiter.hit(client_ip(request))
+
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        with span("db"):
+            existing_user = await run_db(db, crud.get_user_by_email, user_data.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
+        # Hand the pooled connection back while the password is hashed
+        await release_db(db)
+
         # Hash password and create user
-        hashed_pwd = hash_password(user_data.password)
-        new_user = User(
-            name=user_data.name,
-            email=user_data.email,
-            hashed_password=hashed_pwd
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-
-        # Return a plain dict (avoid returning ORM object directly)
-        return {
-            "id": new_user.id,
-            "name": new_user.name,
-            "email": new_user.email,
-            "created_at": new_user.created_at,
-        }
-    except HTTPException:
+        with span("hash"):
+            async with hash_admission.admit():
+                hashed_pwd = await hash_password_async(user_data.password)
+        try:
+            with span("db"):
+                new_user = await run_write(
+                    db, crud.create_user, user_data.name, user_data.email, hashed_pwd
+                )
+        except IntegrityError:
+            # Lost a race with a concurrent registration of the same email
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Email already registered"
+            )
+
+        # Validated once from the ORM row and serialized as is
+        return model_response(UserResponse.model_validate(new_user))
+    except (HTTPException, HashingQueueFull):
         raise
     except Exception as e:
         logger.exception("Error registering user")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/register/batch", response_model=RegisterBatchResponse)
+async def register_batch(batch: RegisterBatchRequest, request: Request, db: DbSession = Depends(get_db)):
+    """Register many users in one transaction; per-item status in request order."""
+    try:
+        ip_limiter.hit(client_ip(request))
+
+        # One set-based duplicate check for the whole batch
+        with span("db"):
+            existing = await run_db(db, crud.get_existing_emails, {u.email for u in batch.users})
+        await release_db(db)
+
+        # The first occurrence of each new email is created, the rest are duplicates
+        to_create = {}
+        for item in batch.users:
+            if item.email not in existing and item.email not in to_create:
+                to_create[item.email] = item
+
+        with span("hash"):
+            async with hash_admission.admit():
+                hashes = await hash_passwords_async([u.password for u in to_create.values()])
+        rows = [
+            {"name": u.name, "email": u.email, "hashed_password": hashed}
+            for u, hashed in zip(to_create.values(), hashes)
+        ]
+        try:
+            with span("db"):
+                created = await run_write(db, crud.create_users_bulk, rows)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Some emails were registered concurrently; retry the batch"
+            )
+        created_users = {user.email: UserResponse.model_validate(user) for user in created}
+
+        results = []
+        for item in batch.users:
+            principal = created_users.pop(item.email, None)
+            if principal is None:
+                results.append(RegisterBatchResult(email=item.email, status="duplicate"))
+            else:
+                results.append(RegisterBatchResult(email=item.email, status="created", user=principal))
+        return model_response(RegisterBatchResponse(created=len(rows), results=results))
+    except (HTTPException, HashingQueueFull):
+        raise
+    except Exception as e:
+        logger.exception("Error registering user batch")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/login", response_model=TokenResponse)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, request: Request, db: DbSession = Depends(get_db)):
     """Login with email and password, return JWT token."""
     try:
+        # Cheap per-source limits before any DB or bcrypt work
+        ip_limiter.hit(client_ip(request))
+        email_limiter.hit(credentials.email)
+
         # Find user by email
-        user = db.query(User).filter(User.email == credentials.email).first()
-        if not user or not verify_password(credentials.password, user.hashed_password):
+        with span("db"):
+            user = await run_db(db, crud.get_user_by_email, credentials.email)
+        # Hand the pooled connection back while bcrypt runs; loaded attributes stay readable
+        await release_db(db)
+        password_ok = False
+        if user:
+            with span("hash"):
+                async with hash_admission.admit():
+                    password_ok = await verify_password_async(credentials.password, user.hashed_password)
+        if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
+        if needs_rehash(user.hashed_password):
+            await upgrade_password_hash(db, user, credentials.password)
+
+        # Start a refresh-token session; later tokens come from /token/refresh
+        refresh_token, refresh_hash = create_refresh_token()
+        with span("db"):
+            await run_write(
+                db, crud.create_refresh_session, user.id, secrets.token_hex(16), refresh_hash,
+                refresh_expiry(int(time.time())),
+            )
 
         # Create JWT token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.email},
-            expires_delta=access_token_expires
-        )
+        return token_response(cache_principal(user), refresh_token)
+    except (HTTPException, HashingQueueFull):
+        raise
+    except Exception as e:
+        logger.exception("Error during login")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/token/refresh", response_model=TokenResponse)
+async def refresh_access_token(body: RefreshRequest, db: DbSession = Depends(get_db)):
+    """Rotate a refresh token into a new access token and refresh token.
 
-        user_dict = {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "created_at": user.created_at,
-        }
-
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": user_dict,
-        }
+    No password check and no hashing: one indexed lookup and one write.
+    """
+    try:
+        new_refresh_token, new_hash = create_refresh_token()
+        now = int(time.time())
+        with span("db"):
+            outcome, user = await run_write(
+                db, crud.rotate_refresh_session, refresh_token_digest(body.refresh_token),
+                new_hash, now, refresh_expiry(now),
+            )
+        if outcome == "reused":
+            metrics.REFRESH_TOKEN_REUSE.inc()
+            logger.warning("Refresh token of user %s was reused; session revoked", user.id)
+        if outcome != "rotated":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token"
+            )
+
+        return token_response(cache_principal(user), new_refresh_token)
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception("Error during login")
+        logger.exception("Error refreshing token")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/logout")
+async def logout(request: Request, body: Optional[LogoutRequest] = None,
+                 db: DbSession = Depends(get_db)):
+    """End the refresh session given in the body and revoke the bearer token, if any.
+
+    Either credential is enough on its own: the refresh token ends its
+    session even when the access token has already expired.
+    """
+    refresh_token = body.refresh_token if body is not None else None
+    token = authorization_credentials(request, "Bearer")
+    payload = None
+    if token is not None:
+        with span("jwt"):
+            payload = verify_token_cached(token)
+    if payload is None and not refresh_token:
+        raise unauthorized("Invalid or expired token" if token else "Bearer token required", "Bearer")
+    revocable = payload is not None and payload["jti"] is not None and payload["exp"] is not None
+    if payload is not None and not revocable and not refresh_token:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked"
+        )
+
+    if refresh_token:
+        with span("db"):
+            ended = await run_write(db, crud.revoke_refresh_session,
+                                    refresh_token_digest(refresh_token), int(time.time()))
+        if not ended and payload is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token"
+            )
+    if revocable:
+        with span("db"):
+            await run_write(db, crud.revoke_token, payload["jti"], int(payload["exp"]))
+        revocations.add(payload["jti"], int(payload["exp"]))
+    return {"message": "Logged out"}
+
+
 @app.get("/verify", response_model=VerifyTokenResponse)
-def verify(token: str, db: Session = Depends(get_db)):
+async def verify(token: str, db: DbSession = Depends(get_read_db)):
     """Verify a JWT token and return user info."""
     try:
-        payload = verify_token(token)
+        with span("jwt"):
+            payload = verify_token_cached(token)
         if payload is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired token"
             )
 
-        # Get user from database
-        user = db.query(User).filter(User.email == payload["email"]).first()
-        if not user:
+        # Serve the user from the principal cache; fall back to the database
+        principal = await principal_for_email(db, payload["email"])
+        if principal is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
 
-        user_dict = {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "created_at": user.created_at,
-        }
-
-        return {
-            "valid": True,
-            "user": user_dict,
-        }
+        return model_response(VerifyTokenResponse(valid=True, user=principal))
     except HTTPException:
         raise
     except Exception as e:
@@ -145,6 +583,83 @@ def verify(token: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/verify/batch", response_model=VerifyBatchResponse)
+async def verify_batch(batch: VerifyBatchRequest, db: DbSession = Depends(get_read_db)):
+    """Verify many JWT tokens at once; results are returned in request order."""
+    try:
+        with span("jwt"):
+            claims = [verify_token_cached(token) for token in batch.tokens]
+
+        # Resolve every referenced user: cache first, then one IN query for the rest
+        principals = {}
+        missing = set()
+        for payload in claims:
+            if payload is None or payload["email"] in principals:
+                continue
+            principal = principal_cache.get(payload["email"])
+            if principal is None:
+                missing.add(payload["email"])
+            else:
+                principals[payload["email"]] = principal
+        if missing:
+            with span("db"):
+                users = await run_db(db, crud.get_users_by_emails, missing)
+            for user in users:
+                principals[user.email] = cache_principal(user)
+
+        results = []
+        for payload in claims:
+            if payload is None:
+                results.append(VerifyBatchResult(valid=False, error="Invalid or expired token"))
+            elif payload["email"] not in principals:
+                results.append(VerifyBatchResult(valid=False, error="User not found"))
+            else:
+                results.append(VerifyBatchResult(valid=True, user=principals[payload["email"]]))
+        return model_response(VerifyBatchResponse(results=results))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error verifying token batch")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/me", response_model=UserResponse)
+async def read_me(user: UserResponse = Depends(current_principal)):
+    """The calling user, authenticated by bearer token or API key."""
+    return model_response(user)
+
+
+@app.post("/api-keys", response_model=ApiKeyIssued)
+async def issue_api_key(body: ApiKeyCreate, user: UserResponse = Depends(bearer_principal),
+                        db: DbSession = Depends(get_db)):
+    """Issue an API key for the logged-in user; the key is shown only once."""
+    key, prefix, digest = apikeys.generate_key()
+    with span("db"):
+        api_key = await run_write(db, crud.create_api_key, user.id, body.name, prefix, digest)
+    return {**ApiKeyInfo.model_validate(api_key).model_dump(), "key": key}
+
+
+@app.get("/api-keys", response_model=List[ApiKeyInfo])
+async def list_api_keys(user: UserResponse = Depends(bearer_principal),
+                        db: DbSession = Depends(get_read_db)):
+    """The logged-in user's API keys (prefixes only), revoked ones included."""
+    with span("db"):
+        return await run_db(db, crud.get_api_keys, user.id)
+
+
+@app.delete("/api-keys/{key_id}", response_model=ApiKeyInfo)
+async def revoke_api_key(key_id: int, user: UserResponse = Depends(bearer_principal),
+                         db: DbSession = Depends(get_db)):
+    """Revoke one of the logged-in user's API keys."""
+    with span("db"):
+        api_key = await run_write(db, crud.revoke_api_key, user.id, key_id)
+    if api_key is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API key not found")
+    # Dropped after the commit; other worker processes notice within api_key_cache_ttl
+    api_key_cache.invalidate(api_key.prefix)
+    return api_key
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,318 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+No client library or external service: counters, gauges and histograms
+live in this process and ``GET /metrics`` renders them in the Prometheus
+text format (version 0.0.4), so any scraper (or ``curl``) can read them.
+
+Recording is meant to stay on in production. A labelled child is looked up
+once per label set and cached; an observation is then a bisect over the
+bucket bounds plus three additions under an uncontended lock.
+``benchmarks/metrics_overhead.py`` measures the cost.
+
+Values that other modules already count (cache hits, shed requests, ...)
+are not duplicated here: ``Registry.collector`` registers a callback that
+reads them at scrape time.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from config import settings
+
+ENABLED = settings.metrics_enabled
+
+# Seconds; spans cache hits (~µs) up to a slow bcrypt under load
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+# (metric name suffix, labels, value) as produced for one exposition line
+Sample = Tuple[str, Dict[str, str], float]
+# (name, type, help, samples) returned by collector callbacks
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Return the child for one label set (cached; keep the result)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_dict(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (name it ``*_total``)."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> List[Sample]:
+        return [("", self._label_dict(values), child.value)
+                for values, child in list(self._children.items())]
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Point-in-time value."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def samples(self) -> List[Sample]:
+        return [("", self._label_dict(values), child.value)
+                for values, child in list(self._children.items())]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        for values, child in list(self._children.items()):
+            labels = self._label_dict(values)
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                out.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            out.append(("_sum", labels, total))
+            out.append(("_count", labels, count))
+        return out
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together on ``/metrics``."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Family]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], List[Family]]) -> Callable[[], List[Family]]:
+        """Register ``fn`` to produce extra metric families at scrape time."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        families: List[Family] = [
+            (metric.name, metric.kind, metric.documentation, metric.samples())
+            for metric in self._metrics.values()
+        ]
+        for collect in self._collectors:
+            families.extend(collect())
+
+        lines: List[str] = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "auth_request_duration_seconds", "Time to serve a request, by route", ("method", "route"))
+RESPONSES = REGISTRY.counter(
+    "auth_responses_total", "Responses sent, by route and status code", ("method", "route", "status"))
+HASH_LATENCY = REGISTRY.histogram(
+    "auth_password_hash_duration_seconds", "CPU time of one password hash or check", ("op",))
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "auth_db_query_duration_seconds", "Time spent executing one SQL statement", ("engine",))
+BCRYPT_COST = REGISTRY.gauge(
+    "auth_bcrypt_cost", "bcrypt cost factor used for new password hashes")
+PASSWORD_REHASHES = REGISTRY.counter(
+    "auth_password_rehashes_total", "Stored hashes upgraded to the current parameters on login")
+REFRESH_TOKEN_REUSE = REGISTRY.counter(
+    "auth_refresh_token_reuse_total", "Rotated refresh tokens presented again (chain revoked)")
+WARMUP_DURATION = REGISTRY.gauge(
+    "auth_warmup_duration_seconds", "Time spent in each start-up warm-up step", ("step",))
+JWT_LATENCY = REGISTRY.histogram(
+    "auth_jwt_duration_seconds", "Time to sign or decode one access token", ("op",))
+
+
+def route_label(scope: dict) -> str:
+    """The route template (``/verify``), not the raw path, to bound label cardinality."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and status per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method, route = scope["method"], route_label(scope)
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            RESPONSES.labels(method, route, str(status_code)).inc()
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Time every statement ``engine`` executes (sync engines and ``AsyncEngine.sync_engine``)."""
+    from sqlalchemy import event
+
+    child = DB_QUERY_LATENCY.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "query_start", None)
+        if start is not None:
+            child.observe(time.perf_counter() - start)
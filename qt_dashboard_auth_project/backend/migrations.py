@@ -0,0 +1,251 @@
+"""Versioned schema migrations, applied at start-up.
+
+The schema version lives in SQLite's ``PRAGMA user_version`` (other
+databases get a one-row ``schema_version`` table), so when the schema is
+current the start-up check is that single read. Otherwise the migrations
+registered below with ``@migration`` run in version order:
+
+* a transactional migration gets a connection inside ``BEGIN IMMEDIATE``
+  and the new version is written in the same transaction. Several workers
+  starting at once queue on the write lock and re-read the version, so
+  each migration runs once;
+* a non-transactional one (``transactional=False``) gets the engine. It is
+  meant for ``backfill``, which fills a new column in batches with a commit
+  and a short pause after each. Requests keep reading and writing in
+  between instead of waiting on one long lock. It must be safe to re-run,
+  because the version is only recorded once it finishes.
+
+A new database is created from the models and stamped with the latest
+version without replaying history. Migrations that change a table should
+therefore skip objects that already exist (``add_column`` does, and
+``CREATE INDEX IF NOT EXISTS``).
+
+    python migrations.py            # show the current and latest version
+    python migrations.py upgrade    # apply pending migrations
+"""
+import argparse
+import logging
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from config import settings
+from database import Base, engine as default_engine
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from schemas import normalize_email
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    fn: Callable[[Any], None]
+    transactional: bool
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str, transactional: bool = True):
+    """Register ``fn`` as the migration to schema ``version``."""
+    def register(fn: Callable[[Any], None]) -> Callable[[Any], None]:
+        expected = MIGRATIONS[-1].version + 1 if MIGRATIONS else 1
+        if version != expected:
+            raise ValueError(f"Migration {version} registered out of order (expected {expected})")
+        MIGRATIONS.append(Migration(version, description, fn, transactional))
+        return fn
+    return register
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def _is_sqlite(conn: Connection) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def get_version(conn: Connection) -> int:
+    """The schema version recorded in the database (0 before the first migration)."""
+    if _is_sqlite(conn):
+        return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+    conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+    return conn.exec_driver_sql("SELECT max(version) FROM schema_version").scalar() or 0
+
+
+def set_version(conn: Connection, version: int) -> None:
+    if _is_sqlite(conn):
+        # PRAGMA takes no bound parameters; the version is always an int
+        conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+    else:
+        conn.exec_driver_sql("DELETE FROM schema_version")
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+
+
+def _begin_write(conn: Connection) -> None:
+    # Take SQLite's write lock before reading the version, so two starting
+    # workers cannot both decide to apply the same migration
+    if _is_sqlite(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def add_column(conn: Connection, table: str, column_ddl: str) -> bool:
+    """``ALTER TABLE table ADD COLUMN column_ddl`` unless the column exists."""
+    name = column_ddl.split()[0]
+    if any(col["name"] == name for col in inspect(conn).get_columns(table)):
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column_ddl}")
+    return True
+
+
+def backfill(engine: Engine, table: str, column: str, source: Sequence[str],
+             compute: Callable[..., Any], batch_size: Optional[int] = None,
+             pause: Optional[float] = None) -> int:
+    """Set ``column`` where it is NULL to ``compute(*source values)``, batch by batch.
+
+    Rows are visited in ``id`` order, ``batch_size`` per transaction, with
+    ``pause`` seconds between batches so other writers get the lock. The
+    UPDATE also matches the source values it was computed from: a row
+    changed in the meantime is left NULL, since the code that changed it
+    already sets the column. Returns the number of rows updated.
+    """
+    batch_size = batch_size or settings.migration_batch_size
+    pause = settings.migration_batch_pause_ms / 1000.0 if pause is None else pause
+    columns = ", ".join(source)
+    select_sql = text(
+        f"SELECT id, {columns} FROM {table} WHERE id > :last AND {column} IS NULL "
+        f"ORDER BY id LIMIT :limit"
+    )
+    unchanged = " AND ".join(f"{name} = :src_{i}" for i, name in enumerate(source))
+    update_sql = text(f"UPDATE {table} SET {column} = :value WHERE id = :id AND {unchanged}")
+
+    updated, last_id, started = 0, 0, time.perf_counter()
+    while True:
+        with engine.connect() as conn:
+            _begin_write(conn)
+            rows = conn.execute(select_sql, {"last": last_id, "limit": batch_size}).all()
+            if rows:
+                params: List[Dict[str, Any]] = []
+                for row in rows:
+                    values = row[1:]
+                    param = {"id": row[0], "value": compute(*values)}
+                    param.update({f"src_{i}": value for i, value in enumerate(values)})
+                    params.append(param)
+                updated += conn.execute(update_sql, params).rowcount
+            conn.commit()
+        if len(rows) < batch_size:
+            break
+        last_id = rows[-1][0]
+        logger.info("Backfilled %s.%s up to id %d", table, column, last_id)
+        time.sleep(pause)
+    logger.info("Backfilled %d rows of %s.%s in %.1f s", updated, table, column,
+                time.perf_counter() - started)
+    return updated
+
+
+@migration(1, "baseline: the tables that create_all made before versioning")
+def _baseline(conn: Connection) -> None:
+    Base.metadata.create_all(conn)
+
+
+@migration(2, "users.email_normalized column")
+def _add_email_normalized(conn: Connection) -> None:
+    add_column(conn, "users", "email_normalized VARCHAR")
+
+
+@migration(3, "backfill users.email_normalized", transactional=False)
+def _backfill_email_normalized(engine: Engine) -> None:
+    backfill(engine, "users", "email_normalized", ["email"], normalize_email)
+
+
+@migration(4, "unique index on users.email_normalized")
+def _index_email_normalized(conn: Connection) -> None:
+    clashes = conn.exec_driver_sql(
+        "SELECT group_concat(email, ', ') FROM users WHERE email_normalized IS NOT NULL "
+        "GROUP BY email_normalized HAVING count(*) > 1"
+    ).scalars().all()
+    if clashes:
+        # Two accounts can't be merged automatically; leave the choice to an operator
+        raise RuntimeError(
+            "Emails that differ only in case belong to different users; rename or remove "
+            "all but one of each before upgrading: " + "; ".join(clashes)
+        )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email_normalized ON users (email_normalized)"
+    )
+
+
+def _apply(engine: Engine, step: Migration) -> bool:
+    """Run one migration unless another process already did; True if it ran."""
+    started = time.perf_counter()
+    if step.transactional:
+        with engine.connect() as conn:
+            _begin_write(conn)
+            if get_version(conn) >= step.version:
+                conn.rollback()
+                return False
+            step.fn(conn)
+            set_version(conn, step.version)
+            conn.commit()
+    else:
+        step.fn(engine)
+        with engine.connect() as conn:
+            _begin_write(conn)
+            if get_version(conn) < step.version:
+                set_version(conn, step.version)
+            conn.commit()
+    logger.info("Migrated schema to version %d (%s) in %.0f ms", step.version,
+                step.description, (time.perf_counter() - started) * 1000)
+    return True
+
+
+def migrate(engine: Engine = default_engine) -> int:
+    """Bring the schema up to date; returns the version it is at."""
+    with engine.connect() as conn:
+        version = get_version(conn)
+        if version == latest_version():
+            return version
+        if version > latest_version():
+            raise RuntimeError(
+                f"Database schema version {version} is newer than this code ({latest_version()})"
+            )
+        fresh = version == 0 and not inspect(conn).has_table("users")
+        conn.commit()
+
+    if fresh:
+        with engine.connect() as conn:
+            _begin_write(conn)
+            if get_version(conn) == 0:
+                Base.metadata.create_all(conn)
+                set_version(conn, latest_version())
+            conn.commit()
+        logger.info("Created a new database at schema version %d", latest_version())
+        return latest_version()
+
+    for step in MIGRATIONS:
+        if step.version > version:
+            _apply(engine, step)
+    return latest_version()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Show or apply schema migrations")
+    parser.add_argument("command", nargs="?", choices=("status", "upgrade"), default="status")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "upgrade":
+        migrate()
+    with default_engine.connect() as conn:
+        current = get_version(conn)
+    print(f"schema version {current}, latest {latest_version()}")
+    for step in MIGRATIONS:
+        mark = "x" if step.version <= current else " "
+        print(f"  [{mark}] {step.version}: {step.description}")
+
+
+if __name__ == "__main__":
+    main()
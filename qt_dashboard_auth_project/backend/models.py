@@ -1,16 +1,72 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
 from sqlalchemy.sql import func
 from database import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    # Fetch server defaults (created_at) during the INSERT itself
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
+    # schemas.normalize_email(email): what lookups and uniqueness go by. Nullable
+    # only because SQLite cannot add a NOT NULL column; every insert sets it.
+    email_normalized = Column(String, unique=True, index=True, nullable=True)
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     def __repr__(self):
         return f"<User(id={self.id}, name={self.name}, email={self.email})>"
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    name = Column(String, nullable=False)
+    # Public part of the key, used to find the row; the secret is only stored as an HMAC
+    prefix = Column(String, unique=True, index=True, nullable=False)
+    secret_digest = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ApiKey(id={self.id}, user_id={self.user_id}, prefix={self.prefix})>"
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    # The token's "exp" claim (Unix seconds); the row is swept after that
+    expires_at = Column(Integer, index=True, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
+
+
+class RefreshSession(Base):
+    """One refresh token of a login session; each refresh rotates to a new row."""
+
+    __tablename__ = "sessions"
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    # Shared by all tokens descending from one login
+    family_id = Column(String, index=True, nullable=False)
+    # SHA-256 of the refresh token; the token itself is never stored
+    token_hash = Column(String, unique=True, index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Unix seconds
+    expires_at = Column(Integer, index=True, nullable=False)
+    rotated_at = Column(Integer, nullable=True)
+    revoked_at = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<RefreshSession(id={self.id}, user_id={self.user_id}, family_id={self.family_id})>"
@@ -0,0 +1,30 @@
+"""JSON responses rendered straight from Pydantic models.
+
+FastAPI validates whatever an endpoint returns against its ``response_model``
+and only then serializes it. The hot endpoints already hold validated
+models (``UserResponse`` is built from the ORM row with ``from_attributes``
+and cached as such), so that second pass is pure overhead. They return
+``model_response(...)`` instead: a finished ``Response`` that FastAPI sends
+as is, rendered to bytes in one step by pydantic-core's compiled
+serializer. The routes keep ``response_model`` for the OpenAPI schema.
+"""
+from functools import lru_cache
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+from timing import span
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_: Any) -> TypeAdapter:
+    """``TypeAdapter`` for ``type_``, built (and its serializer compiled) once."""
+    return TypeAdapter(type_)
+
+
+def model_response(value: Any, type_: Optional[Any] = None, status_code: int = 200) -> Response:
+    """Serialize ``value`` (a model instance, or a value of ``type_``) without re-validating it."""
+    with span("serialize"):
+        body = type_adapter(type_ if type_ is not None else type(value)).dump_json(value)
+    return Response(content=body, status_code=status_code, media_type="application/json")
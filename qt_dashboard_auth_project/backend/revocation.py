@@ -0,0 +1,124 @@
+"""Revoked access tokens, checked from memory on every verification.
+
+Access tokens carry a random ``jti``. ``/logout`` stores it in the
+``revoked_tokens`` table together with the token's expiry and adds it to
+this process's ``RevocationList``:
+
+* a Bloom filter answers "not revoked" for almost every token after one
+  BLAKE2b digest and a few bit probes; that is the whole cost of the check
+  on the common path;
+* only when the filter matches is the exact ``jti -> exp`` dict consulted,
+  which rules out the filter's false positives.
+
+A revocation only matters until the token expires. ``replace`` (called by
+the periodic sweep in ``main.py`` with the table's unexpired rows) drops
+expired entries, picks up revocations made by other worker processes and
+rebuilds the filter, which cannot forget entries by itself.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, with double hashing of one digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def _seeds(item: str) -> Tuple[int, int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, item: str) -> None:
+        h1, h2 = self._seeds(item)
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.size
+            self._bits[bit >> 3] |= 1 << (bit & 7)
+
+    def __contains__(self, item: str) -> bool:
+        # Probes are computed one at a time: a miss usually stops at the first
+        h1, h2 = self._seeds(item)
+        bits, size = self._bits, self.size
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % size
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """In-memory set of revoked ``jti``s (with expiry) behind a Bloom filter."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._entries: Dict[str, int] = {}
+        self._filter = BloomFilter(capacity, error_rate)
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        # Tokens issued without a jti cannot be revoked
+        if jti is None or not self._entries or jti not in self._filter:
+            return False
+        self.filter_hits += 1
+        exp = self._entries.get(jti)
+        if exp is None:
+            self.false_positives += 1
+            return False
+        return exp > time.time()
+
+    def add(self, jti: str, exp: int) -> None:
+        with self._lock:
+            self._entries[jti] = exp
+            if len(self._entries) > self.capacity:
+                # Keep the false-positive rate: grow instead of overfilling
+                self.capacity *= 2
+                self._rebuild()
+            else:
+                self._filter.add(jti)
+
+    def replace(self, entries: Dict[str, int]) -> None:
+        """Swap in ``entries`` (``jti -> exp``), keeping unexpired local additions."""
+        now = time.time()
+        with self._lock:
+            merged = {jti: exp for jti, exp in self._entries.items() if exp > now}
+            merged.update(entries)
+            self._entries = merged
+            while len(merged) > self.capacity:
+                self.capacity *= 2
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in self._entries:
+            bloom.add(jti)
+        self._filter = bloom
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "filter_bits": self._filter.size,
+            "filter_hashes": self._filter.hashes,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
+
+
+revocations = RevocationList(
+    capacity=settings.revocation_capacity, error_rate=settings.revocation_error_rate
+)
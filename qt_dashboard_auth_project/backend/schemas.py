@@ -1,37 +1,108 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field
 from datetime import datetime
+from typing import Annotated, List, Optional
+
+from config import settings
+
+
+def normalize_email(email: str) -> str:
+    """The form emails are compared in: ``Bob@X.com`` and ``bob@x.com`` are one user."""
+    return email.strip().lower()
+
+
+# Normalized once at the edge; everything downstream compares it as is
+NormalizedEmail = Annotated[EmailStr, AfterValidator(normalize_email)]
 
 
 class UserRegister(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     name: str
-    email: EmailStr
+    email: NormalizedEmail
     password: str
 
-    class Config:
-        from_attributes = True
-
 
 class UserLogin(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
     password: str
 
 
 class UserResponse(BaseModel):
+    # Built straight from ``models.User`` rows, then cached and served as is
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     email: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str
+    # Seconds until the access token expires
+    expires_in: int
+    refresh_token: str
     user: UserResponse
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    # End this refresh token's session; enough on its own once the access token has expired
+    refresh_token: Optional[str] = None
+
+
 class VerifyTokenResponse(BaseModel):
     valid: bool
-    user: UserResponse = None
+    user: Optional[UserResponse] = None
+
+
+class VerifyBatchRequest(BaseModel):
+    tokens: List[str] = Field(..., max_length=settings.verify_batch_max_tokens)
+
+
+class VerifyBatchResult(BaseModel):
+    valid: bool
+    user: Optional[UserResponse] = None
+    error: Optional[str] = None
+
+
+class VerifyBatchResponse(BaseModel):
+    results: List[VerifyBatchResult]
+
+
+class RegisterBatchRequest(BaseModel):
+    users: List[UserRegister] = Field(..., max_length=settings.register_batch_max_users)
+
+
+class RegisterBatchResult(BaseModel):
+    email: str
+    status: str  # "created" or "duplicate"
+    user: Optional[UserResponse] = None
+
+
+class RegisterBatchResponse(BaseModel):
+    created: int
+    results: List[RegisterBatchResult]
+
+
+class ApiKeyCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+
+class ApiKeyInfo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    prefix: str
+    created_at: datetime
+    revoked_at: Optional[datetime] = None
+
+
+class ApiKeyIssued(ApiKeyInfo):
+    # The full key; it is only ever returned by the request that created it
+    key: str
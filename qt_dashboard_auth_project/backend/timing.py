@@ -0,0 +1,95 @@
+"""Per-request timing breakdown, returned in a ``Server-Timing`` header.
+
+``ServerTimingMiddleware`` gives every HTTP request an empty breakdown in a
+context variable; handlers wrap their stages in ``span("hash")``,
+``span("db")``, ``span("jwt")``, and ``TimedJSONResponse`` times rendering
+as ``serialize``. When the response starts the middleware adds::
+
+    Server-Timing: db;dur=0.41, hash;dur=251.30, jwt;dur=0.62, serialize;dur=0.05, total;dur=253.10
+
+Durations are milliseconds and accumulate when a stage runs more than
+once. Context variables follow the request into ``run_in_threadpool`` and
+``AsyncSession.run_sync``, so spans opened there land in the same
+breakdown. Outside a request, ``span`` does nothing.
+
+With ``AUTH_SLOW_REQUEST_MS`` set, requests slower than that are logged
+together with their breakdown.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+_breakdown: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timing", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Add the time spent in the block to the current request's ``name`` stage."""
+    timings = _breakdown.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={ms:.2f}" for name, ms in sorted(timings.items()))
+
+
+class TimedJSONResponse(JSONResponse):
+    """``JSONResponse`` whose rendering is recorded as the ``serialize`` stage."""
+
+    def render(self, content) -> bytes:
+        with span("serialize"):
+            return super().render(content)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware that collects spans and emits ``Server-Timing``."""
+
+    def __init__(self, app, slow_request_ms: float = 0.0):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _breakdown.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timings["total"] = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _breakdown.reset(token)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if self.slow_request_ms and elapsed_ms >= self.slow_request_ms:
+                logger.warning(
+                    "Slow request %s %s -> %d in %.1f ms (%s)",
+                    scope["method"], scope["path"], status_code, elapsed_ms,
+                    format_server_timing(timings),
+                )
+
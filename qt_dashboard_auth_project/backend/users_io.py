@@ -0,0 +1,192 @@
+"""Bulk import/export of the ``users`` table as CSV or JSON Lines.
+
+Runs directly against the database configured in ``config.py`` (no HTTP
+layer) and streams in both directions, so memory stays constant no matter
+how many rows are moved.
+
+Usage (from the backend directory):
+    python users_io.py export users.jsonl
+    python users_io.py export - --format csv > users.csv
+    python users_io.py import users.csv --hashed
+    python users_io.py import users.jsonl --chunk-size 20000
+
+Import columns: ``name``, ``email`` and either ``hashed_password`` (stored
+as-is, see ``--hashed``) or ``password`` (hashed here, in parallel).
+``created_at`` is kept when present. Rows whose email already exists
+(compared case-insensitively) are skipped unless ``--on-conflict fail`` is given.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, IO, Iterable, Iterator, List, Optional
+
+from auth import hash_password
+from config import settings
+from database import engine
+from migrations import migrate
+from schemas import normalize_email
+
+FIELDS = ["id", "name", "email", "hashed_password", "created_at"]
+
+# Applied for the duration of an import only. Durability is relaxed because a
+# failed import can simply be re-run (existing emails are skipped).
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",  # 256 MiB
+}
+
+INSERT_SQL = (
+    "INSERT {verb} INTO users (name, email, email_normalized, hashed_password, created_at) "
+    "VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))"
+)
+
+EXPORT_SQL = (
+    "SELECT id, name, email, hashed_password, created_at FROM users "
+    "WHERE id > ? ORDER BY id LIMIT ?"
+)
+
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+@contextmanager
+def _open(path: str, mode: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, newline="", encoding="utf-8") as fh:
+        yield fh
+
+
+def read_rows(fh: IO[str], fmt: str) -> Iterator[Dict[str, str]]:
+    if fmt == "csv":
+        yield from csv.DictReader(fh)
+        return
+    for line in fh:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _chunks(rows: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _to_params(chunk: List[Dict[str, str]], hashed: bool, pool: ThreadPoolExecutor) -> List[tuple]:
+    if hashed:
+        passwords = [row["hashed_password"] for row in chunk]
+    else:
+        passwords = list(pool.map(hash_password, (row["password"] for row in chunk)))
+    return [
+        (row["name"], row["email"], normalize_email(row["email"]), password,
+         row.get("created_at") or None)
+        for row, password in zip(chunk, passwords)
+    ]
+
+
+def import_users(path: str, fmt: Optional[str] = None, hashed: bool = False,
+                 chunk_size: int = 10_000, on_conflict: str = "skip") -> int:
+    """Stream rows from ``path`` into ``users``; return the number inserted."""
+    fmt = _detect_format(path, fmt)
+    migrate(engine)
+    sql = INSERT_SQL.format(verb="OR IGNORE" if on_conflict == "skip" else "")
+    inserted = 0
+    started = time.perf_counter()
+
+    with _open(path, "r") as fh, engine.connect() as conn, \
+            ThreadPoolExecutor(max_workers=settings.hash_workers) as pool:
+        previous = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in BULK_LOAD_PRAGMAS
+        }
+        for name, value in BULK_LOAD_PRAGMAS.items():
+            conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+        conn.commit()
+        try:
+            for chunk in _chunks(read_rows(fh, fmt), chunk_size):
+                params = _to_params(chunk, hashed, pool)
+                result = conn.exec_driver_sql(sql, params)
+                conn.commit()
+                inserted += max(result.rowcount, 0)
+                rate = inserted / max(time.perf_counter() - started, 1e-9)
+                print(f"\rimported {inserted:,} rows ({rate:,.0f}/s)", end="", file=sys.stderr)
+        finally:
+            conn.rollback()
+            for name, value in previous.items():
+                conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+            print(file=sys.stderr)
+    return inserted
+
+
+def export_users(path: str, fmt: Optional[str] = None, chunk_size: int = 10_000) -> int:
+    """Stream ``users`` to ``path`` in id order; return the number of rows.
+
+    Pages are fetched by keyset (``id > last_id``), so every page costs one
+    index seek no matter how deep into the table the export is.
+    """
+    fmt = _detect_format(path, fmt)
+    exported = 0
+    last_id = 0
+    with _open(path, "w") as fh, engine.connect() as conn:
+        writer = csv.writer(fh) if fmt == "csv" else None
+        if writer:
+            writer.writerow(FIELDS)
+        while True:
+            page = conn.exec_driver_sql(EXPORT_SQL, (last_id, chunk_size)).fetchall()
+            if not page:
+                break
+            for row in page:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    fh.write(json.dumps(dict(zip(FIELDS, row)), default=str))
+                    fh.write("\n")
+            exported += len(page)
+            last_id = page[-1][0]
+            conn.rollback()  # don't pin a read snapshot across the whole export
+    return exported
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import/export of users.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="load users from CSV/JSONL")
+    imp.add_argument("path", help="input file, or - for stdin")
+    imp.add_argument("--format", choices=["csv", "jsonl"])
+    imp.add_argument("--hashed", action="store_true",
+                     help="rows carry hashed_password; store it without re-hashing")
+    imp.add_argument("--chunk-size", type=int, default=10_000)
+    imp.add_argument("--on-conflict", choices=["skip", "fail"], default="skip")
+
+    exp = sub.add_parser("export", help="dump users to CSV/JSONL")
+    exp.add_argument("path", help="output file, or - for stdout")
+    exp.add_argument("--format", choices=["csv", "jsonl"])
+    exp.add_argument("--chunk-size", type=int, default=10_000)
+
+    args = parser.parse_args(argv)
+    if args.command == "import":
+        count = import_users(args.path, args.format, args.hashed, args.chunk_size, args.on_conflict)
+        print(f"Imported {count} users", file=sys.stderr)
+    else:
+        count = export_users(args.path, args.format, args.chunk_size)
+        print(f"Exported {count} users", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Start-up warm-up, so the first requests after a boot are not the slow ones.
+
+A fresh process pays for a lot on first use: opening pooled connections
+(and applying the SQLite PRAGMAs), compiling each query shape into
+SQLAlchemy's statement cache, starting the hashing workers, loading the JWT
+signing keys and filling the caches one miss at a time. ``warm_up`` does all
+of it once, before traffic arrives:
+
+* ``pool``: opens ``warmup_connections`` connections on every engine and
+  runs ``SELECT 1`` on each, plus one no-op job on the single writer;
+* ``queries``: runs the hot ``crud`` reads once per session kind with keys
+  that match nothing;
+* ``hash``: one hash, then one verify per hashing worker at the same time,
+  so every worker (thread or process) has started;
+* ``jwt``: signs and decodes a token;
+* ``caches``: loads up to ``warmup_cache_entries`` recent users into
+  ``principal_cache`` and active keys into ``api_key_cache``.
+
+The lifespan runs it as a background task and ``/readyz`` answers 503 until
+it has finished. A failing step is logged and skipped: warm-up only makes
+the first requests faster, it must not keep the server out of rotation.
+Step durations are exported as ``auth_warmup_duration_seconds``.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+import apikeys
+import crud
+import database
+import metrics
+from auth import create_access_token, get_hasher, verify_password, verify_token
+from cache import api_key_cache, principal_cache
+from config import settings
+from database import DbSession, get_db, get_read_db, run_db
+from hashing import get_executor
+from schemas import UserResponse
+from writer import SINGLE_WRITER, run_write
+
+logger = logging.getLogger(__name__)
+
+# Lookups by these keys exercise the query shapes without matching a row
+_PROBE_EMAIL = "warmup@invalid.example"
+_PROBE_PREFIX = "0" * (2 * apikeys.PREFIX_BYTES)
+
+
+class WarmupState:
+    """Progress of the start-up warm-up, read by ``/readyz`` and ``/stats``."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "seconds": self.seconds,
+            "steps": dict(self.steps),
+            "failed": dict(self.failed),
+        }
+
+
+state = WarmupState()
+
+
+def _open_sync(engine, count: int) -> None:
+    connections = [engine.connect() for _ in range(count)]
+    try:
+        for conn in connections:
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+async def _open_async(engine, count: int) -> None:
+    connections = []
+    try:
+        # Appended one by one so a cancelled warm-up still closes what it opened
+        for _ in range(count):
+            connections.append(await engine.connect())
+        for conn in connections:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            await conn.close()
+
+
+def _noop_write(db) -> None:
+    db.execute(text("SELECT 1"))
+
+
+async def warm_pools() -> None:
+    count = max(1, settings.warmup_connections)
+    for engine in (database.engine, database.read_engine):
+        if engine is not None:
+            await run_in_threadpool(_open_sync, engine, count)
+    for engine in (database.async_engine, database.async_read_engine):
+        if engine is not None:
+            await _open_async(engine, count)
+    if SINGLE_WRITER:
+        async for db in get_db():
+            await run_write(db, _noop_write)
+
+
+def _run_queries(db) -> None:
+    crud.get_user_by_email(db, _PROBE_EMAIL)
+    crud.get_users_by_emails(db, [_PROBE_EMAIL])
+    crud.get_existing_emails(db, [_PROBE_EMAIL])
+    crud.get_active_api_key(db, _PROBE_PREFIX)
+
+
+async def warm_queries() -> None:
+    # Statements are compiled and cached per engine: run them on both pools
+    for sessions in (get_db, get_read_db):
+        async for db in sessions():
+            await run_db(db, _run_queries)
+
+
+async def warm_hashing() -> None:
+    executor = get_executor()
+    hashed = await executor.run(get_hasher().hash, _PROBE_EMAIL)
+    await asyncio.gather(*(
+        executor.run(verify_password, _PROBE_EMAIL, hashed) for _ in range(executor.workers)
+    ))
+
+
+async def warm_jwt() -> None:
+    verify_token(create_access_token({"sub": _PROBE_EMAIL}))
+
+
+async def _fill_caches(db: DbSession, limit: int) -> None:
+    users = await run_db(db, crud.get_recent_users, min(limit, principal_cache.maxsize))
+    for user in reversed(users):
+        principal_cache.set(user.email, UserResponse.model_validate(user))
+    keys = await run_db(db, crud.get_recent_active_api_keys, min(limit, api_key_cache.maxsize))
+    for api_key, user in reversed(keys):
+        api_key_cache.set(api_key.prefix, apikeys.cache_entry(api_key, user))
+    logger.info("Warm-up cached %d users and %d API keys", len(users), len(keys))
+
+
+async def warm_caches() -> None:
+    if settings.warmup_cache_entries <= 0:
+        return
+    async for db in get_read_db():
+        await _fill_caches(db, settings.warmup_cache_entries)
+
+
+STEPS = (
+    ("pool", warm_pools),
+    ("queries", warm_queries),
+    ("hash", warm_hashing),
+    ("jwt", warm_jwt),
+    ("caches", warm_caches),
+)
+
+
+async def warm_up() -> None:
+    """Run every warm-up step once, then mark the process ready."""
+    state.started_at = time.perf_counter()
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as exc:
+            logger.warning("Warm-up step %r failed", name, exc_info=True)
+            state.failed[name] = repr(exc)
+        elapsed = time.perf_counter() - start
+        state.steps[name] = elapsed
+        metrics.WARMUP_DURATION.labels(name).set(elapsed)
+    finish()
+    logger.info("Warm-up finished in %.0f ms (%s)", state.seconds * 1000,
+                ", ".join(f"{name} {s * 1000:.0f} ms" for name, s in state.steps.items()))
+
+
+def finish() -> None:
+    """Mark the process ready (also used when warm-up is disabled)."""
+    state.seconds = time.perf_counter() - state.started_at if state.started_at else 0.0
+    metrics.WARMUP_DURATION.labels("total").set(state.seconds)
+    state.ready = True
@@ -0,0 +1,207 @@
+"""Single-writer queue with group commit for SQLite.
+
+SQLite allows one writer at a time, and a commit per request means one fsync
+per request plus "database is locked" errors when several connections race
+for the write lock. With ``AUTH_SINGLE_WRITER`` enabled all writes go through
+one dedicated connection owned by a background thread instead:
+
+* callers submit write jobs (``fn(session, *args)``) to a queue;
+* the writer drains up to ``writer_max_batch`` jobs (when several are
+  pending it waits at most ``writer_max_delay_ms`` for more to arrive),
+  runs each inside its own SAVEPOINT and commits the whole group at once
+  (one fsync);
+* a failing job rolls back only its savepoint and gets its own exception;
+  the rest of the group still commits.
+
+The connection runs in WAL mode, so the request sessions from
+``database.get_db`` keep reading from their own pool while a group commits.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from config import settings
+from database import DATABASE_URL, DbSession, _connect_args, configure_sqlite, run_db
+from metrics import ENABLED as METRICS_ENABLED, instrument_engine
+
+logger = logging.getLogger(__name__)
+
+SINGLE_WRITER = settings.single_writer and DATABASE_URL.startswith("sqlite")
+
+T = TypeVar("T")
+_Job = Tuple[Future, Callable[..., Any], tuple]
+_STOP = object()
+
+
+def _writer_engine(url: str):
+    engine = create_engine(url, poolclass=StaticPool, connect_args=_connect_args(url))
+    configure_sqlite(engine)
+    if METRICS_ENABLED:
+        instrument_engine(engine, "writer")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy issue BEGIN itself so SAVEPOINTs work with pysqlite.
+        # WAL is required here whatever the profile says: readers must not
+        # block on the writer.
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        # Take the write lock up front instead of upgrading mid-transaction
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+class WriteQueue:
+    """Background thread committing queued write jobs in groups."""
+
+    def __init__(self, url: str, max_batch: int, max_delay: float):
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay)
+        self._engine = _writer_engine(url)
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self.jobs = 0
+        self.failed_jobs = 0
+        self.commits = 0
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        """Queue ``fn(session, *args)``; the future resolves after its group commits."""
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _collect(self, first: _Job) -> Tuple[List[_Job], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                # A lone job commits right away; only wait for stragglers
+                # when writes are evidently arriving concurrently
+                remaining = deadline - time.monotonic()
+                if len(batch) == 1 or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        session = Session(bind=self._engine, autoflush=False, expire_on_commit=False)
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._commit_group(session, batch)
+        session.close()
+        self._engine.dispose()
+
+    def _commit_group(self, session: Session, batch: List[_Job]) -> None:
+        outcomes: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        for future, fn, args in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with session.begin_nested():
+                    result = fn(session, *args)
+                outcomes.append((future, result, None))
+            except Exception as exc:
+                outcomes.append((future, None, exc))
+        try:
+            session.commit()
+        except Exception as exc:
+            logger.exception("Group commit of %d write jobs failed", len(outcomes))
+            session.rollback()
+            outcomes = [(future, None, exc) for future, _, _ in outcomes]
+        else:
+            self.commits += 1
+        # Results are handed to other threads; don't keep them in this session
+        session.expunge_all()
+
+        for future, result, error in outcomes:
+            self.jobs += 1
+            if error is not None:
+                self.failed_jobs += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "jobs": self.jobs,
+            "failed_jobs": self.failed_jobs,
+            "commits": self.commits,
+            "avg_group_size": self.jobs / self.commits if self.commits else 0.0,
+        }
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commit whatever is queued, then stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+_writer: Optional[WriteQueue] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteQueue:
+    """Return the process-wide writer, starting it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteQueue(
+                    DATABASE_URL,
+                    max_batch=settings.writer_max_batch,
+                    max_delay=settings.writer_max_delay_ms / 1000.0,
+                )
+    return _writer
+
+
+def stop_writer(timeout: Optional[float] = None) -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.stop(timeout)
+            _writer = None
+
+
+def _commit_after(session: Session, fn: Callable[..., T], *args: Any) -> T:
+    result = fn(session, *args)
+    session.commit()
+    return result
+
+
+async def run_write(db: DbSession, fn: Callable[..., T], *args: Any) -> T:
+    """Run the write job ``fn(session, *args)`` and commit it.
+
+    With the single writer enabled the job joins the next group commit;
+    otherwise it runs on the request session and commits right away.
+    """
+    if SINGLE_WRITER:
+        return await get_writer().run(fn, *args)
+    return await run_db(db, _commit_after, fn, *args)
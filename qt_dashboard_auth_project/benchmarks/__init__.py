@@ -0,0 +1,5 @@
+"""Benchmarks for the auth backend.
+
+Run them from ``qt_dashboard_auth_project`` with ``python -m benchmarks.<name>``.
+They always work on a scratch database, never on ``backend/users.db``.
+"""
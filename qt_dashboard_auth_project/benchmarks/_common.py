@@ -0,0 +1,134 @@
+"""Shared helpers for the benchmark scripts."""
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+def use_backend(**overrides) -> Path:
+    """Make the backend importable and point it at a scratch database.
+
+    Must be called before any backend module is imported. Keyword arguments
+    become ``AUTH_*`` environment overrides for ``config.Settings``.
+    Returns the scratch directory.
+    """
+    scratch = Path(tempfile.mkdtemp(prefix="authbench-"))
+    os.environ.setdefault("AUTH_DATABASE_URL", f"sqlite:///{scratch / 'users.db'}")
+    os.environ.setdefault("AUTH_JWT_KEY_DIR", str(scratch / "keys"))
+    for key, value in overrides.items():
+        os.environ[f"AUTH_{key.upper()}"] = str(value)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    return scratch
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def measure(fn: Callable[[], object], min_time: float, repeat: int) -> Dict[str, float]:
+    """Median and minimum microseconds per call of ``fn``, timeit style."""
+    fn()  # warm up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5 or loops >= 1 << 24:
+            break
+        loops *= 10 if elapsed < min_time / 50 else 2
+    loops = max(1, int(loops * min_time / max(elapsed, 1e-9)))
+
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - start) / loops)
+    return {
+        "median_us": statistics.median(runs) * 1e6,
+        "min_us": min(runs) * 1e6,
+        "loops": loops,
+    }
+
+
+def print_table(headers: List[str], rows: Iterable[Sequence[object]]) -> None:
+    rows = [[_fmt(cell) for cell in row] for row in rows]
+    widths = [max(len(h), *(len(r[i]) for r in rows)) if rows else len(h) for i, h in enumerate(headers)]
+    print("  ".join(h.rjust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(cell.rjust(w) for cell, w in zip(row, widths)))
+
+
+def _fmt(cell: object) -> str:
+    if isinstance(cell, float):
+        return f"{cell:.2f}"
+    return str(cell)
+
+
+def migrate_schema() -> None:
+    """Create the scratch database's schema, as the app's lifespan would."""
+    from migrations import migrate
+
+    migrate()
+
+
+def seed_users(count: int, password: str = "benchmark-password", prefix: str = "user") -> List[str]:
+    """Insert ``count`` users sharing one precomputed hash; return their emails."""
+    from sqlalchemy import insert
+
+    from auth import hash_password
+    from database import engine
+    from models import User
+
+    migrate_schema()
+    hashed = hash_password(password)
+    emails = [f"{prefix}{i}@example.com" for i in range(count)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"User {i}", "email": email, "email_normalized": email, "hashed_password": hashed}
+            for i, email in enumerate(emails)
+        ])
+    return emails
+
+
+def start_uvicorn(port: int, env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    """Serve ``main:app`` from the backend directory on 127.0.0.1:``port``.
+
+    The server inherits the ``AUTH_*`` variables set by ``use_backend``;
+    ``env`` adds or overrides variables for this server only.
+    """
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+           "--port", str(port), "--log-level", "warning", "--backlog", "4096"]
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=dict(os.environ, **(env or {})))
+
+
+async def wait_until_up(client, timeout: float = 15.0) -> None:
+    """Poll ``GET /readyz`` with an ``httpx.AsyncClient`` until the server is warmed up."""
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/readyz")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
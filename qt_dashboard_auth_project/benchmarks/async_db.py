@@ -0,0 +1,101 @@
+"""Requests/sec and server thread count for the async vs. sync engine modes.
+
+Starts a local uvicorn for each ``AUTH_DB_MODE`` on a scratch database and
+drives ``/verify`` (one indexed ``users`` lookup per request) with many
+concurrent clients. The thread count of the server process is sampled while
+the load runs: in sync mode every in-flight query holds a threadpool thread,
+in async mode queries wait on the aiosqlite connection instead.
+
+    python -m benchmarks.async_db --clients 500 --duration 10
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from benchmarks._common import percentile, print_table, start_uvicorn, use_backend, wait_until_up
+
+import httpx
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+
+def thread_count(pid: int) -> int:
+    """Threads of ``pid`` (Linux /proc, else psutil when installed)."""
+    status = Path(f"/proc/{pid}/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    try:
+        import psutil
+    except ImportError:
+        return -1
+    return psutil.Process(pid).num_threads()
+
+
+async def run_mode(mode: str, port: int, clients: int, duration: float, scratch: Path):
+    proc = start_uvicorn(port, {"AUTH_DB_MODE": mode,
+                                "AUTH_DATABASE_URL": f"sqlite:///{scratch / f'{mode}.db'}"})
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                     timeout=60) as client:
+            await wait_until_up(client)
+            await client.post("/register", json={"name": "Bench", "email": EMAIL, "password": PASSWORD})
+            r = await client.post("/login", json={"email": EMAIL, "password": PASSWORD})
+            token = r.json()["access_token"]
+
+            latencies: list = []
+            errors = 0
+            threads: list = []
+            deadline = time.perf_counter() + duration
+
+            async def worker():
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        resp = await client.get("/verify", params={"token": token})
+                        ok = resp.status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    if ok:
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    else:
+                        errors += 1
+
+            async def sampler():
+                while time.perf_counter() < deadline:
+                    threads.append(thread_count(proc.pid))
+                    await asyncio.sleep(0.2)
+
+            await asyncio.gather(sampler(), *(worker() for _ in range(clients)))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    return [mode, len(latencies) / duration, errors, percentile(latencies, 50),
+            percentile(latencies, 99), max(threads, default=-1)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"])
+    args = parser.parse_args()
+
+    scratch = use_backend()
+    rows = []
+    for i, mode in enumerate(args.modes):
+        rows.append(await run_mode(mode, args.port + i, args.clients, args.duration, scratch))
+
+    print(f"/verify with {args.clients} concurrent clients, {args.duration:.0f}s per mode")
+    print_table(["mode", "req/s", "errors", "p50 ms", "p99 ms", "peak threads"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Login throughput vs. hashing workers, with /verify latency under the flood.
+
+For each worker count a pool of clients hammers ``/login`` while a single
+probe calls ``/verify`` back to back. Login throughput should grow with the
+number of hashing workers (up to the core count) while the ``/verify`` p99
+stays flat, because bcrypt no longer runs on the request threadpool.
+
+    python -m benchmarks.hashing --duration 5 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks._common import migrate_schema, percentile, print_table, use_backend
+
+# Let the hashing executor be the only limit: no rate limits, no admission queue cap
+use_backend(
+    rate_limit_ip_per_second=1e9, rate_limit_ip_burst=10**9,
+    rate_limit_email_per_second=1e9, rate_limit_email_burst=10**9,
+    admission_concurrency=10**4, admission_queue_size=10**4,
+)
+
+import httpx  # noqa: E402
+
+import hashing  # noqa: E402
+from config import settings  # noqa: E402
+from main import app  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchmark-password"
+
+
+async def _flood(client: httpx.AsyncClient, deadline: float, counts: dict) -> None:
+    while time.perf_counter() < deadline:
+        r = await client.post("/login", json={"email": EMAIL, "password": PASSWORD})
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        if r.status_code == 503:
+            await asyncio.sleep(0.01)
+
+
+async def _probe(client: httpx.AsyncClient, token: str, deadline: float, samples: list) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        r = await client.get("/verify", params={"token": token})
+        samples.append((time.perf_counter() - start) * 1000)
+        assert r.status_code == 200, r.text
+
+
+async def run_one(client: httpx.AsyncClient, token: str, workers: int, clients: int, duration: float):
+    hashing.shutdown_executor()
+    settings.hash_workers = workers
+    counts: dict = {}
+    samples: list = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(
+        _probe(client, token, deadline, samples),
+        *(_flood(client, deadline, counts) for _ in range(clients)),
+    )
+    return [
+        workers,
+        counts.get(200, 0) / duration,
+        counts.get(503, 0),
+        percentile(samples, 50),
+        percentile(samples, 99),
+    ]
+
+
+async def main() -> None:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per step")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, max(1, cpus // 2), cpus}))
+    args = parser.parse_args()
+
+    migrate_schema()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/register", json={"name": "Bench", "email": EMAIL, "password": PASSWORD})
+        token = (await client.post("/login", json={"email": EMAIL, "password": PASSWORD})).json()["access_token"]
+
+        rows = []
+        for workers in args.workers:
+            rows.append(await run_one(client, token, workers, args.clients, args.duration))
+    hashing.shutdown_executor()
+
+    print(f"{cpus} CPU(s), {args.clients} login clients, {args.duration:.0f}s per step")
+    print_table(["workers", "logins/s", "shed(503)", "verify p50 ms", "verify p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,267 @@
+"""Open-loop load generator for the auth API: throughput and latency percentiles.
+
+Requests are sent on a fixed arrival schedule (``--arrival uniform``, or
+``poisson`` for exponential gaps) regardless of how fast earlier ones
+complete, and every latency is measured from the request's *scheduled*
+start. A saturated server therefore shows up as growing latency instead of
+the generator quietly slowing down with it (coordinated omission).
+
+``--concurrency`` caps requests in flight, like a client connection pool:
+a request that has to wait for a slot keeps its original scheduled time.
+Sweeping ``--rates`` × ``--concurrency`` gives capacity curves: achieved
+throughput and tail latency against offered load.
+
+Targets:
+
+* ``inprocess`` (default): the app is imported and driven over httpx's ASGI
+  transport; no sockets, no other processes.
+* ``uvicorn``: a local uvicorn is started on a scratch database.
+* ``--url``: an already running server (nothing is started; the database
+  must accept the benchmark's registrations).
+
+``--mix`` weights endpoints, e.g. ``verify=90,login=8,register=2``. Before
+the sweep ``--users`` accounts are registered and logged in once; ``login``
+and ``verify`` pick from them, ``register`` always creates a new account.
+Per-IP/per-email rate limits are disabled for the servers started here
+(all traffic comes from one address); admission control stays on, so shed
+requests count as errors.
+
+    python -m benchmarks.loadgen --mix verify=90,login=8,register=2 \\
+        --rates 50 100 200 --concurrency 16 64 --duration 10 --json results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from benchmarks._common import (
+    migrate_schema, percentile, print_table, start_uvicorn, use_backend, wait_until_up,
+)
+
+use_backend(
+    rate_limit_ip_per_second=1e9, rate_limit_ip_burst=10**9,
+    rate_limit_email_per_second=1e9, rate_limit_email_burst=10**9,
+)
+
+import httpx  # noqa: E402
+
+ENDPOINTS = ("register", "login", "verify")
+PASSWORD = "benchmark-password"
+PERCENTILES = (50, 95, 99, 99.9)
+
+_new_ids = itertools.count()
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} (choose from {ENDPOINTS})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs a positive weight")
+    return mix
+
+
+class Workload:
+    """The accounts used by the load, and one request of each kind."""
+
+    def __init__(self, client: httpx.AsyncClient, run_id: str):
+        self.client = client
+        self.run_id = run_id
+        self.emails: List[str] = []
+        self.tokens: List[str] = []
+
+    async def prepare(self, users: int) -> None:
+        self.emails = [f"load-{self.run_id}-{i}@example.com" for i in range(users)]
+        r = await self.client.post("/register/batch", json={"users": [
+            {"name": "Load", "email": email, "password": PASSWORD} for email in self.emails
+        ]}, timeout=600)
+        r.raise_for_status()
+        for email in self.emails:
+            r = await self.client.post("/login", json={"email": email, "password": PASSWORD})
+            r.raise_for_status()
+            self.tokens.append(r.json()["access_token"])
+
+    async def send(self, kind: str) -> int:
+        if kind == "verify":
+            r = await self.client.get("/verify", params={"token": random.choice(self.tokens)})
+        elif kind == "login":
+            r = await self.client.post("/login", json={"email": random.choice(self.emails),
+                                                       "password": PASSWORD})
+        else:
+            email = f"new-{self.run_id}-{next(_new_ids)}@example.com"
+            r = await self.client.post("/register", json={"name": "Load", "email": email,
+                                                          "password": PASSWORD})
+        return r.status_code
+
+
+def schedule(rate: float, duration: float, arrival: str) -> List[float]:
+    """Offsets (seconds from the start) at which requests are due."""
+    if arrival == "uniform":
+        return [i / rate for i in range(int(rate * duration))]
+    offsets, t = [], random.expovariate(rate)
+    while t < duration:
+        offsets.append(t)
+        t += random.expovariate(rate)
+    return offsets
+
+
+async def run_step(workload: Workload, mix: Dict[str, float], rate: float, concurrency: int,
+                   duration: float, arrival: str, timeout: float) -> Dict:
+    kinds, weights = zip(*mix.items())
+    offsets = schedule(rate, duration, arrival)
+    plan = list(zip(offsets, random.choices(kinds, weights, k=len(offsets))))
+    slots = asyncio.Semaphore(concurrency)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def one(due: float, kind: str) -> None:
+        async with slots:
+            try:
+                status = await asyncio.wait_for(workload.send(kind), timeout)
+            except asyncio.TimeoutError:
+                status = "timeout"
+            except httpx.HTTPError:
+                status = "error"
+        # From the scheduled start: waiting for a slot counts as latency
+        latencies[kind].append((time.perf_counter() - due) * 1000)
+        statuses[kind][str(status)] += 1
+
+    start = time.perf_counter()
+    tasks = []
+    for offset, kind in plan:
+        due = start + offset
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(due, kind)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    def summary(samples: List[float], counts: Counter) -> Dict:
+        ok = sum(n for status, n in counts.items() if status.startswith("2"))
+        return {
+            "requests": len(samples),
+            "ok": ok,
+            "errors": len(samples) - ok,
+            "statuses": dict(counts),
+            **{f"p{p:g}_ms": percentile(samples, p) for p in PERCENTILES},
+            "max_ms": max(samples, default=0.0),
+        }
+
+    all_samples = [ms for samples in latencies.values() for ms in samples]
+    all_counts = sum(statuses.values(), Counter())
+    overall = summary(all_samples, all_counts)
+    return {
+        "offered_rps": rate,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "achieved_rps": overall["ok"] / elapsed,
+        **overall,
+        "endpoints": {kind: summary(latencies[kind], statuses[kind]) for kind in latencies},
+    }
+
+
+async def sweep(client: httpx.AsyncClient, args) -> List[Dict]:
+    workload = Workload(client, run_id=f"{int(time.time())}-{random.randrange(10**6)}")
+    await workload.prepare(args.users)
+    results = []
+    for concurrency in args.concurrency:
+        for rate in args.rates:
+            result = await run_step(workload, args.mix, rate, concurrency, args.duration,
+                                    args.arrival, args.timeout)
+            results.append(result)
+            print(f"  {rate:g} req/s offered, concurrency {concurrency}: "
+                  f"{result['achieved_rps']:.1f} ok/s, p99 {result['p99_ms']:.1f} ms",
+                  file=sys.stderr)
+    return results
+
+
+async def run(args) -> List[Dict]:
+    limits = httpx.Limits(max_connections=max(args.concurrency),
+                          max_keepalive_connections=max(args.concurrency))
+    if args.target == "inprocess" and not args.url:
+        from main import app
+
+        migrate_schema()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen",
+                                     timeout=args.timeout) as client:
+            return await sweep(client, args)
+
+    proc = None
+    base_url = args.url
+    if not base_url:
+        proc = start_uvicorn(args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            await wait_until_up(client)
+            return await sweep(client, args)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def print_results(results: List[Dict]) -> None:
+    rows: List[List] = []
+    for r in results:
+        rows.append([r["offered_rps"], r["concurrency"], r["achieved_rps"], r["errors"],
+                     *(r[f"p{p:g}_ms"] for p in PERCENTILES), r["max_ms"]])
+    print_table(["offered/s", "conc", "ok/s", "errors", "p50 ms", "p95 ms", "p99 ms",
+                 "p99.9 ms", "max ms"], rows)
+    print()
+    endpoint_rows = []
+    for r in results:
+        for kind, e in sorted(r["endpoints"].items()):
+            endpoint_rows.append([r["offered_rps"], r["concurrency"], kind, e["requests"], e["errors"],
+                                  *(e[f"p{p:g}_ms"] for p in PERCENTILES)])
+    print_table(["offered/s", "conc", "endpoint", "requests", "errors", "p50 ms", "p95 ms",
+                 "p99 ms", "p99.9 ms"], endpoint_rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--url", help="benchmark an already running server instead")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("verify=90,login=8,register=2"))
+    parser.add_argument("--rates", type=float, nargs="+", default=[25, 50, 100],
+                        help="offered requests per second, one step each")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[64],
+                        help="max requests in flight, one sweep each")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per step")
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="uniform")
+    parser.add_argument("--users", type=int, default=10, help="accounts used by login/verify")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON (- for stdout)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    report = {
+        "target": args.url or args.target,
+        "mix": args.mix,
+        "arrival": args.arrival,
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Cost of recording metrics, per observation, per request and per query.
+
+* primitives: nanoseconds per ``Histogram.observe``, ``Counter.inc`` and
+  labelled-child lookup;
+* request: warm ``GET /verify`` driven straight through the app's ASGI
+  stack, without vs. with ``MetricsMiddleware``;
+* query: the /login email lookup on a plain engine vs. one with the
+  per-statement timing events from ``metrics.instrument_engine``.
+
+    python -m benchmarks.metrics_overhead --requests 20000 --queries 20000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._common import print_table, seed_users, use_backend
+
+scratch = use_backend()
+
+import crud  # noqa: E402
+import metrics  # noqa: E402
+from auth import create_access_token  # noqa: E402
+from main import app  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+
+def per_op_ns(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def primitives(n: int):
+    registry = metrics.Registry()
+    histogram = registry.histogram("bench_seconds", "bench", ("route",))
+    counter = registry.counter("bench_total", "bench", ("route",))
+    child = histogram.labels("/verify")
+    baseline = per_op_ns(lambda: None, n)
+    return [
+        ["Histogram child observe", per_op_ns(lambda: child.observe(0.003), n) - baseline],
+        ["Histogram labels().observe", per_op_ns(lambda: histogram.labels("/verify").observe(0.003), n) - baseline],
+        ["Counter labels().inc", per_op_ns(lambda: counter.labels("/verify").inc(), n) - baseline],
+    ]
+
+
+async def asgi_request(asgi_app, path: str, query: bytes) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1),
+        "server": ("bench", 80), "app": app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await asgi_app(scope, receive, send)
+
+
+async def per_request_us(asgi_app, query: bytes, n: int) -> float:
+    for _ in range(200):
+        await asgi_request(asgi_app, "/verify", query)
+    start = time.perf_counter()
+    for _ in range(n):
+        await asgi_request(asgi_app, "/verify", query)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def per_query_us(engine, emails, n: int) -> float:
+    with Session(engine) as db:
+        for email in emails[:200]:
+            crud.get_user_by_email(db, email)
+        start = time.perf_counter()
+        for i in range(n):
+            crud.get_user_by_email(db, emails[i % len(emails)])
+        return (time.perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=500_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print_table(["primitive", "ns/op"], primitives(args.ops))
+    print()
+
+    emails = seed_users(1000)
+    query = f"token={create_access_token({'sub': emails[0]})}".encode()
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not metrics.MetricsMiddleware]
+    stack = app.build_middleware_stack()
+    wrapped_stack = metrics.MetricsMiddleware(stack)
+    # Alternate short rounds so drift on a busy machine hits both sides alike
+    rounds = 10
+    bare = wrapped = 0.0
+    for _ in range(rounds):
+        bare += asyncio.run(per_request_us(stack, query, args.requests // rounds)) / rounds
+        wrapped += asyncio.run(per_request_us(wrapped_stack, query, args.requests // rounds)) / rounds
+
+    url = f"sqlite:///{scratch / 'users.db'}"
+    plain_engine = create_engine(url)
+    timed_engine = create_engine(url)
+    metrics.instrument_engine(timed_engine, "bench")
+    plain = timed = 0.0
+    for _ in range(rounds):
+        plain += per_query_us(plain_engine, emails, args.queries // rounds) / rounds
+        timed += per_query_us(timed_engine, emails, args.queries // rounds) / rounds
+
+    print_table(["path", "without µs", "with µs", "overhead µs", "overhead %"], [
+        ["GET /verify (warm)", bare, wrapped, wrapped - bare, (wrapped - bare) / bare * 100],
+        ["email lookup query", plain, timed, timed - plain, (timed - plain) / plain * 100],
+    ])
+
+
+if __name__ == "__main__":
+    main()
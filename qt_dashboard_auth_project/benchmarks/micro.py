@@ -0,0 +1,150 @@
+"""Micro-benchmarks for the auth primitives, with a saved baseline and regression gate.
+
+Cases (``--filter`` selects by substring):
+
+* ``hash_password`` / ``verify_password`` at bcrypt cost factors ``--costs``
+* ``create_access_token``, ``verify_token`` (full decode) and
+  ``verify_token_cached`` (memo hit)
+* ``is_revoked``: the revocation check of a non-revoked token against 10k
+  revoked ones (Bloom filter miss)
+* ``get_user_by_email``: the indexed ``users`` lookup through the ORM
+* ``api_key_verify`` (HMAC + constant-time compare) and
+  ``get_active_api_key`` (the prefix-index lookup behind an API key cache miss)
+* ``UserResponse`` validation + JSON serialization, from a dict and from a
+  ``User`` row
+
+Each case is timed like ``timeit``: the loop count is calibrated to about
+``--min-time`` seconds, the loop is repeated ``--repeat`` times and the
+median per-call time is reported (the minimum is kept too).
+
+``--save`` writes the results as JSON; ``--baseline`` compares medians
+against such a file and exits with status 1 when any case got slower by
+more than ``--threshold`` (default 25%), so a dependency upgrade that makes
+``/verify`` twice as slow fails the build.
+
+    python -m benchmarks.micro --save baseline.json
+    python -m benchmarks.micro --baseline baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from importlib import metadata
+from typing import Callable, Dict, List, Optional
+
+from benchmarks._common import measure, print_table, seed_users, use_backend
+
+use_backend()
+
+import apikeys  # noqa: E402
+import crud  # noqa: E402
+from auth import create_access_token, verify_password, verify_token, verify_token_cached  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from revocation import RevocationList  # noqa: E402
+from hashers import BcryptHasher  # noqa: E402
+from schemas import UserResponse  # noqa: E402
+
+PASSWORD = "benchmark-password"
+PACKAGES = ("bcrypt", "argon2-cffi", "PyJWT", "cryptography", "SQLAlchemy", "pydantic", "fastapi")
+
+
+def build_cases(costs: List[int]) -> Dict[str, Callable[[], object]]:
+    cases: Dict[str, Callable[[], object]] = {}
+    for cost in costs:
+        hasher = BcryptHasher(cost)
+        hashed = hasher.hash(PASSWORD)
+        cases[f"hash_password[cost={cost}]"] = lambda hasher=hasher: hasher.hash(PASSWORD)
+        cases[f"verify_password[cost={cost}]"] = lambda hashed=hashed: verify_password(PASSWORD, hashed)
+
+    emails = seed_users(1000)
+    token = create_access_token({"sub": emails[0]})
+    cases["create_access_token"] = lambda: create_access_token({"sub": emails[0]})
+    cases["verify_token"] = lambda: verify_token(token)
+    cases["verify_token_cached"] = lambda: verify_token_cached(token)
+
+    revoked = RevocationList(capacity=100_000, error_rate=0.001)
+    revoked.replace({f"revoked-{i}": int(time.time()) + 3600 for i in range(10_000)})
+    jti = verify_token(token)["jti"]
+    cases["is_revoked"] = lambda: revoked.is_revoked(jti)
+
+    db = SessionLocal()
+    cases["get_user_by_email"] = lambda: crud.get_user_by_email(db, emails[500])
+
+    key, prefix, digest = apikeys.generate_key()
+    crud.create_api_key(db, crud.get_user_by_email(db, emails[0]).id, "bench", prefix, digest)
+    db.commit()
+    _, secret = apikeys.parse_key(key)
+    cases["api_key_verify"] = lambda: apikeys.secret_matches(secret, digest)
+    cases["get_active_api_key"] = lambda: crud.get_active_api_key(db, prefix)
+
+    user = crud.get_user_by_email(db, emails[0])
+    user_dict = crud.user_to_dict(user)
+    cases["UserResponse[dict]"] = lambda: UserResponse.model_validate(user_dict).model_dump_json()
+    cases["UserResponse[orm]"] = lambda: UserResponse.model_validate(user).model_dump_json()
+    return cases
+
+
+def environment() -> Dict[str, str]:
+    env = {"python": platform.python_version(), "platform": platform.platform()}
+    for package in PACKAGES:
+        try:
+            env[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            pass
+    return env
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of cases whose median grew by more than ``threshold``."""
+    return [
+        name for name, result in results.items()
+        if name in baseline
+        and result["median_us"] > baseline[name]["median_us"] * (1 + threshold)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--costs", type=int, nargs="+", default=[4, 8, 10, 12])
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against saved results")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown vs. the baseline median (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+
+    results = {}
+    for name, fn in build_cases(args.costs).items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, args.min_time, args.repeat)
+
+    rows = []
+    for name, r in results.items():
+        base = baseline.get(name, {}).get("median_us")
+        change = (r["median_us"] / base - 1) * 100 if base else None
+        rows.append([name, r["median_us"], r["min_us"], base if base else "-",
+                     f"{change:+.1f}%" if change is not None else "-"])
+    print_table(["case", "median µs", "min µs", "baseline µs", "change"], rows)
+
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump({"environment": environment(), "results": results}, fh, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressed by more than {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
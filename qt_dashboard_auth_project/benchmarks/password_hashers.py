@@ -0,0 +1,116 @@
+"""Login throughput and memory per hasher profile: bcrypt vs. the Argon2id profiles.
+
+For every profile a fresh child process hashes one password and then runs
+``--concurrency`` threads verifying it back to back for ``--duration``
+seconds (both libraries release the GIL). Reported per profile: latency of
+a single verify, verifies per second under concurrency, and the growth of
+the process's peak RSS during the run, also divided by the concurrency to
+give the memory one in-flight login costs. A separate process per profile
+keeps one profile's peak from hiding the next.
+
+    python -m benchmarks.password_hashers --concurrency 1 4 --duration 5
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks._common import print_table, use_backend
+
+use_backend()
+
+from config import settings  # noqa: E402
+from hashers import ARGON2_PROFILES, Argon2idHasher, BcryptHasher, Hasher  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+def make_hasher(profile: str) -> Hasher:
+    if profile.startswith("bcrypt-"):
+        return BcryptHasher(int(profile.split("-", 1)[1]))
+    return Argon2idHasher.from_profile(profile)
+
+
+def peak_rss_kib() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_profile(profile: str, concurrency: int, duration: float) -> Dict:
+    # Taken before the first hash so a single login's memory is counted too
+    rss_before = peak_rss_kib()
+    hasher = make_hasher(profile)
+    hashed = hasher.hash(PASSWORD)
+    start = time.perf_counter()
+    assert hasher.verify(PASSWORD, hashed)
+    single_ms = (time.perf_counter() - start) * 1000
+
+    counts = [0] * concurrency
+    deadline = time.perf_counter() + duration
+
+    def worker(slot: int) -> None:
+        while time.perf_counter() < deadline:
+            hasher.verify(PASSWORD, hashed)
+            counts[slot] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rss_growth_mib = (peak_rss_kib() - rss_before) / 1024
+    return {
+        "profile": profile,
+        "params": hasher.params,
+        "concurrency": concurrency,
+        "single_ms": single_ms,
+        "logins_per_s": sum(counts) / elapsed,
+        "peak_rss_growth_mib": rss_growth_mib,
+        "mib_per_login": rss_growth_mib / concurrency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+",
+                        default=[f"bcrypt-{settings.bcrypt_rounds or 12}", *ARGON2_PROFILES])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.child, args.concurrency[0], args.duration)))
+        return
+
+    results: List[Dict] = []
+    for concurrency in args.concurrency:
+        for profile in args.profiles:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.password_hashers", "--child", profile,
+                 "--concurrency", str(concurrency), "--duration", str(args.duration)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print_table(
+        ["profile", "params", "conc", "1 verify ms", "logins/s", "peak RSS +MiB", "MiB/login"],
+        [[r["profile"], ",".join(f"{k[0]}={v}" for k, v in r["params"].items()), r["concurrency"],
+          r["single_ms"], r["logins_per_s"], r["peak_rss_growth_mib"], r["mib_per_login"]]
+         for r in results],
+    )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
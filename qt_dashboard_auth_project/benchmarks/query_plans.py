@@ -0,0 +1,111 @@
+"""Check that the hot queries use an index: EXPLAIN QUERY PLAN for each ``crud`` lookup.
+
+Every case calls the real ``crud`` function on a migrated, seeded scratch
+database and records the SQL it emits. Each SELECT/UPDATE/DELETE is then
+explained with the same parameters. A ``SCAN <table>`` step (a full table or
+full index scan) fails the check, so a query that stops matching its index
+(say ``lower(email) = ?`` instead of ``email_normalized = ?``) exits with
+status 1. Writes are rolled back.
+
+    python -m benchmarks.query_plans --users 10000
+"""
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks._common import print_table, seed_users, use_backend
+
+use_backend()
+
+from sqlalchemy import event  # noqa: E402
+
+import apikeys  # noqa: E402
+import crud  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+Statement = Tuple[str, object]
+
+
+def build_cases(emails: List[str]) -> Dict[str, Callable]:
+    with SessionLocal() as db:
+        user = crud.get_user_by_email(db, emails[0])
+        _, prefix, digest = apikeys.generate_key()
+        crud.create_api_key(db, user.id, "plans", prefix, digest)
+        crud.create_refresh_session(db, user.id, "family", "token-hash", int(time.time()) + 60)
+        db.commit()
+        user_id = user.id
+
+    now = int(time.time())
+    mixed_case = emails[len(emails) // 2].upper()
+    return {
+        "get_user_by_email": lambda db: crud.get_user_by_email(db, mixed_case),
+        "get_users_by_emails": lambda db: crud.get_users_by_emails(db, [mixed_case, emails[1]]),
+        "get_existing_emails": lambda db: crud.get_existing_emails(db, [mixed_case, emails[1]]),
+        "update_password_hash": lambda db: crud.update_password_hash(db, user_id, "x"),
+        "get_api_keys": lambda db: crud.get_api_keys(db, user_id),
+        "get_active_api_key": lambda db: crud.get_active_api_key(db, prefix),
+        "revoke_api_key": lambda db: crud.revoke_api_key(db, user_id, 1),
+        "get_revoked_tokens": lambda db: crud.get_revoked_tokens(db, now),
+        "delete_expired_revocations": lambda db: crud.delete_expired_revocations(db, now),
+        "rotate_refresh_session": lambda db: crud.rotate_refresh_session(db, "token-hash", "next", now, now + 60),
+        "revoke_refresh_session": lambda db: crud.revoke_refresh_session(db, "token-hash", now),
+        "delete_expired_sessions": lambda db: crud.delete_expired_sessions(db, now),
+    }
+
+
+def captured_statements(fn: Callable) -> List[Statement]:
+    """The statements ``fn(session)`` executes, with their parameters."""
+    statements: List[Statement] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            fn(db)
+            db.flush()
+            db.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def query_plan(statement: str, parameters) -> List[str]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+
+    emails = seed_users(args.users, prefix="plan")
+    with engine.connect() as conn:
+        # Give the planner real statistics, as a long-lived database has
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+
+    rows, scans = [], []
+    for name, fn in build_cases(emails).items():
+        for statement, parameters in captured_statements(fn):
+            plan = query_plan(statement, parameters)
+            full_scan = [step for step in plan if step.startswith("SCAN ")]
+            if full_scan:
+                scans.append(name)
+            rows.append([name, " ".join(statement.split())[:60], "; ".join(plan),
+                         "FULL SCAN" if full_scan else "ok"])
+    print_table(["case", "statement", "plan", "check"], rows)
+
+    if scans:
+        print(f"\nFull scans in: {', '.join(sorted(set(scans)))}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""POST /register/batch vs. a loop of POST /register.
+
+Runs in-process over the ASGI transport on a scratch database. Each run
+registers ``--count`` fresh users; the batch path checks duplicates with one
+query, hashes across all hashing workers and inserts in one transaction.
+Both paths pay the same bcrypt cost per user, so the batch speedup comes
+from parallel hashing (cores) plus the per-request/per-commit overhead saved.
+
+    python -m benchmarks.register_batch --count 500
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks._common import migrate_schema, print_table, use_backend
+
+use_backend(
+    rate_limit_ip_per_second=1e9, rate_limit_ip_burst=10**9,
+    admission_concurrency=10**4, admission_queue_size=10**4,
+)
+
+import httpx  # noqa: E402
+
+from main import app  # noqa: E402
+
+
+def make_users(prefix: str, count: int) -> list:
+    return [
+        {"name": f"User {i}", "email": f"{prefix}{i}@example.com", "password": f"password-{i}"}
+        for i in range(count)
+    ]
+
+
+async def looped(client: httpx.AsyncClient, users: list) -> float:
+    start = time.perf_counter()
+    for user in users:
+        r = await client.post("/register", json=user)
+        assert r.status_code == 200, r.text
+    return time.perf_counter() - start
+
+
+async def batched(client: httpx.AsyncClient, users: list) -> float:
+    start = time.perf_counter()
+    r = await client.post("/register/batch", json={"users": users}, timeout=None)
+    assert r.status_code == 200, r.text
+    assert r.json()["created"] == len(users)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+
+    migrate_schema()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        loop_s = await looped(client, make_users("loop", args.count))
+        batch_s = await batched(client, make_users("batch", args.count))
+
+    print(f"{args.count} users, {os.cpu_count()} CPU(s)")
+    print_table(
+        ["path", "seconds", "users/s"],
+        [["loop /register", loop_s, args.count / loop_s],
+         ["/register/batch", batch_s, args.count / batch_s]],
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
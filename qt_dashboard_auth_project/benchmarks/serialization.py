@@ -0,0 +1,116 @@
+"""Per-response serialization cost: FastAPI's response_model pass vs. model_response.
+
+For the ``/verify``, ``/login`` and ``/verify/batch`` bodies, three ways of
+turning the endpoint's data into JSON bytes are timed:
+
+* ``response_model``: how the endpoints worked before. They returned
+  dicts, and FastAPI validated each one against the response model
+  (``from_attributes``), dumped the model to JSON-compatible Python and
+  rendered that with stdlib ``json`` (our default response class).
+* ``model_response``: the endpoints now build ``UserResponse`` models,
+  wrap them and serialize them with the cached compiled serializer
+  (``responses.model_response``), without a second validation.
+
+``[orm]`` starts from the ``User`` rows (a principal cache miss),
+``[cached]`` from what the principal cache holds (dicts before, models
+now). The speedup is relative to ``response_model`` from the same start.
+
+    python -m benchmarks.serialization --batch 100
+"""
+import argparse
+from datetime import timedelta
+from typing import Callable, Dict
+
+from benchmarks._common import measure, print_table, seed_users, use_backend
+
+use_backend()
+
+import crud  # noqa: E402
+from auth import create_access_token  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from responses import model_response  # noqa: E402
+from schemas import (  # noqa: E402
+    TokenResponse, UserResponse, VerifyBatchResponse, VerifyBatchResult, VerifyTokenResponse,
+)
+from timing import TimedJSONResponse  # noqa: E402
+
+
+def response_model_path(model) -> Callable[[Dict], bytes]:
+    """FastAPI's handling of a returned dict with ``response_model=model``."""
+    adapter = TypeAdapter(model)
+
+    def run(content: Dict) -> bytes:
+        value = adapter.validate_python(content, from_attributes=True)
+        return TimedJSONResponse(adapter.dump_python(value, mode="json")).body
+
+    return run
+
+
+def build_cases(batch: int) -> Dict[str, Dict[str, Callable[[], object]]]:
+    emails = seed_users(batch, prefix="ser")
+    db = SessionLocal()
+    users = crud.get_users_by_emails(db, emails)
+    token = create_access_token({"sub": users[0].email}, timedelta(minutes=30))
+    # What the principal cache held before (dicts) and holds now (models)
+    cached_dicts = [crud.user_to_dict(u) for u in users]
+    cached_models = [UserResponse.model_validate(u) for u in users]
+
+    def login(user_info):
+        return {"access_token": token, "token_type": "bearer", "expires_in": 1800,
+                "refresh_token": "r" * 43, "user": user_info}
+
+    verify_old = response_model_path(VerifyTokenResponse)
+    login_old = response_model_path(TokenResponse)
+    batch_old = response_model_path(VerifyBatchResponse)
+    bodies = {
+        "verify": (
+            lambda info: verify_old({"valid": True, "user": info[0]}),
+            lambda info: model_response(VerifyTokenResponse(valid=True, user=info[0])),
+        ),
+        "login": (
+            lambda info: login_old(login(info[0])),
+            lambda info: model_response(TokenResponse(**login(info[0]))),
+        ),
+        f"verify/batch[{batch}]": (
+            lambda info: batch_old({"results": [{"valid": True, "user": u} for u in info]}),
+            lambda info: model_response(VerifyBatchResponse(
+                results=[VerifyBatchResult(valid=True, user=u) for u in info])),
+        ),
+    }
+    cases = {}
+    for body, (old, new) in bodies.items():
+        # Single-user bodies only use the first user
+        n = len(users) if body.startswith("verify/batch") else 1
+        rows, dicts, models = users[:n], cached_dicts[:n], cached_models[:n]
+        cases[body] = {
+            "response_model[orm]": lambda old=old, rows=rows: old([crud.user_to_dict(u) for u in rows]),
+            "model_response[orm]": lambda new=new, rows=rows: new(
+                [UserResponse.model_validate(u) for u in rows]),
+            "response_model[cached]": lambda old=old, dicts=dicts: old(dicts),
+            "model_response[cached]": lambda new=new, models=models: new(models),
+        }
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=100, help="tokens in the /verify/batch body")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for body, paths in build_cases(args.batch).items():
+        baselines = {}
+        for path, fn in paths.items():
+            result = measure(fn, args.min_time, args.repeat)
+            source = path.split("[")[1]
+            baseline = baselines.setdefault(source, result["median_us"])
+            rows.append([body, path, result["median_us"], result["min_us"],
+                         f"{baseline / result['median_us']:.2f}x"])
+    print_table(["body", "path", "median µs", "min µs", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
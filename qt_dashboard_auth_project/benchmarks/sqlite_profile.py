@@ -0,0 +1,88 @@
+"""Query latency of the /login and /verify lookups with and without the SQLite profile.
+
+Both endpoints boil down to ``crud.get_user_by_email`` on a fresh request
+session. "default" uses a plain engine (driver defaults, rollback journal);
+"tuned" uses the connection profile from ``database.configure_sqlite``
+(WAL, synchronous=NORMAL, page cache, mmap, statement cache) and, for
+/verify, the read-only pool. Each run gets its own copy of the seeded
+database so journal modes don't leak between them.
+
+    python -m benchmarks.sqlite_profile --users 100000 --lookups 20000 --threads 1 8
+"""
+import argparse
+import random
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import percentile, print_table, seed_users, use_backend
+
+scratch = use_backend()
+
+import crud  # noqa: E402
+from database import DATABASE_URL, _connect_args, _engine_kwargs, configure_sqlite, engine  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+
+def make_sessions(profile: str, endpoint: str):
+    path = scratch / f"{profile}-{endpoint}.db"
+    shutil.copyfile(scratch / "users.db", path)
+    url = f"sqlite:///{path}"
+    if profile == "default":
+        bench_engine = create_engine(url, connect_args={"check_same_thread": False})
+    else:
+        bench_engine = create_engine(url, connect_args=_connect_args(url), **_engine_kwargs(url))
+        configure_sqlite(bench_engine, read_only=endpoint == "verify")
+    return bench_engine, sessionmaker(bind=bench_engine, autoflush=False, expire_on_commit=False)
+
+
+def run_step(profile: str, endpoint: str, emails, lookups: int, threads: int):
+    bench_engine, Session = make_sessions(profile, endpoint)
+    picks = [random.choice(emails) for _ in range(lookups)]
+
+    def lookup(email: str) -> float:
+        start = time.perf_counter()
+        with Session() as db:
+            crud.get_user_by_email(db, email)
+        return (time.perf_counter() - start) * 1000
+
+    # Warm the pool and the page cache the same way for both profiles
+    for email in picks[:200]:
+        lookup(email)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(lookup, picks))
+    elapsed = time.perf_counter() - started
+    bench_engine.dispose()
+    return [endpoint, profile, threads, lookups / elapsed, percentile(latencies, 50),
+            percentile(latencies, 95), percentile(latencies, 99)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    emails = seed_users(args.users)
+    engine.dispose()
+    # Seeding went through the tuned engine; put the file back in rollback
+    # journal mode so the "default" copies really start from driver defaults
+    with sqlite3.connect(scratch / "users.db") as conn:
+        conn.execute("PRAGMA journal_mode=DELETE")
+    print(f"{args.users} users in {DATABASE_URL}")
+
+    rows = []
+    for threads in args.threads:
+        for endpoint in ("login", "verify"):
+            for profile in ("default", "tuned"):
+                rows.append(run_step(profile, endpoint, emails, args.lookups, threads))
+    print_table(["endpoint", "profile", "threads", "queries/s", "p50 ms", "p95 ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
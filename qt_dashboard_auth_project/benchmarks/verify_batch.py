@@ -0,0 +1,71 @@
+"""POST /verify/batch vs. N sequential GET /verify calls.
+
+Both paths run in-process over the ASGI transport against a scratch database
+with one distinct user per token. "cold" clears the token and principal
+caches before each run so every user has to come from SQLite; "warm" reuses
+them.
+
+    python -m benchmarks.verify_batch --sizes 10 100 1000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._common import print_table, seed_users, use_backend
+
+use_backend(verify_batch_max_tokens=100_000)
+
+import httpx  # noqa: E402
+
+from auth import create_access_token  # noqa: E402
+from cache import principal_cache, token_cache  # noqa: E402
+from main import app  # noqa: E402
+
+
+async def sequential(client: httpx.AsyncClient, tokens: list) -> float:
+    start = time.perf_counter()
+    for token in tokens:
+        r = await client.get("/verify", params={"token": token})
+        assert r.status_code == 200, r.text
+    return time.perf_counter() - start
+
+
+async def batched(client: httpx.AsyncClient, tokens: list) -> float:
+    start = time.perf_counter()
+    r = await client.post("/verify/batch", json={"tokens": tokens})
+    assert r.status_code == 200, r.text
+    assert all(item["valid"] for item in r.json()["results"])
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    emails = seed_users(max(args.sizes))
+    tokens = [create_access_token({"sub": email}) for email in emails]
+
+    rows = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in args.sizes:
+            for state in ("cold", "warm"):
+                timings = {}
+                for name, fn in (("sequential", sequential), ("batch", batched)):
+                    best = float("inf")
+                    for _ in range(args.repeat):
+                        if state == "cold":
+                            token_cache.clear()
+                            principal_cache.clear()
+                        best = min(best, await fn(client, tokens[:size]))
+                    timings[name] = best
+                rows.append([size, state, timings["sequential"] * 1000, timings["batch"] * 1000,
+                             timings["sequential"] / timings["batch"]])
+
+    print_table(["tokens", "caches", "sequential ms", "batch ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Insert throughput: single writer with group commit vs. commit per request.
+
+Each of ``--writers`` concurrent tasks inserts users back to back for
+``--duration`` seconds. "direct" is the classic path (request session in the
+threadpool, one transaction and fsync per insert); "group" submits the same
+job to the single-writer queue, which commits many inserts at once.
+
+    python -m benchmarks.writer --writers 1 8 64 --duration 5
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from benchmarks._common import migrate_schema, percentile, print_table, use_backend
+
+use_backend()
+
+import crud  # noqa: E402
+import writer  # noqa: E402
+from database import SessionLocal  # noqa: E402
+
+_ids = itertools.count()
+
+
+async def run_step(mode: str, writers: int, duration: float):
+    writer.SINGLE_WRITER = mode == "group"
+    latencies: list = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            email = f"w{next(_ids)}@example.com"
+            db = SessionLocal()
+            start = time.perf_counter()
+            try:
+                await writer.run_write(db, crud.create_user, "Bench", email, "x")
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                errors += 1
+            finally:
+                db.close()
+
+    await asyncio.gather(*(worker() for _ in range(writers)))
+    stats = writer.get_writer().stats() if mode == "group" else {}
+    writer.stop_writer()
+    return [mode, writers, len(latencies) / duration, errors, percentile(latencies, 50),
+            percentile(latencies, 99), stats.get("avg_group_size", 1.0)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    migrate_schema()
+    rows = []
+    for writers in args.writers:
+        for mode in ("direct", "group"):
+            rows.append(await run_step(mode, writers, args.duration))
+    print_table(["mode", "writers", "inserts/s", "errors", "p50 ms", "p99 ms", "avg group"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
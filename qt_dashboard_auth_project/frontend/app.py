@@ -215,6 +215,10 @@ class DashboardTab(QWidget):
         self.info_label = QLabel()
         layout.addWidget(self.info_label)
 
+        # Server-side timing of recent requests
+        self.timing_label = QLabel()
+        layout.addWidget(self.timing_label)
+
         layout.addStretch()
 
         # Logout button
@@ -234,6 +238,13 @@ class DashboardTab(QWidget):
             f"Token: {user_data.get('access_token', '')[:30]}..."
         )
 
+    def set_timings(self, history):
+        lines = ["Recent server timings (ms):"]
+        for entry in reversed(history[-5:]):
+            stages = ", ".join(f"{name} {ms:.1f}" for name, ms in entry["timings"].items())
+            lines.append(f"{entry['endpoint']} [{entry['status']}]: {stages}")
+        self.timing_label.setText("\n".join(lines) if history else "")
+
     def _on_logout(self):
         if self.on_logout:
             self.on_logout()
@@ -270,6 +281,7 @@ class MainWindow(QMainWindow):
     def _on_login_success(self, user_data):
         """Handle successful login."""
         self.dashboard_tab.set_user_data(user_data)
+        self.dashboard_tab.set_timings(self.auth_client.timing_history())
         self.tabs.setTabEnabled(2, True)
         self.tabs.setCurrentIndex(2)
 
@@ -279,8 +291,14 @@ class MainWindow(QMainWindow):
 
     def _on_logout(self):
         """Handle logout."""
-        self.auth_client.token = None
-        self.auth_client.user = None
+        result = self.auth_client.logout()
+        if not result["success"]:
+            # The tokens are kept: the session is still live on the server
+            QMessageBox.critical(
+                self, "Logout Failed",
+                f"Error: {result['error']}"
+            )
+            return
         self.tabs.setTabEnabled(2, False)
         self.login_tab.email_input.clear()
         self.login_tab.password_input.clear()
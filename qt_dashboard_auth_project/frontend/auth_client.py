@@ -1,14 +1,62 @@
+import threading
+import time
+from collections import deque
+
+import jwt
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Deque, List
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse ``Server-Timing`` (``db;dur=0.41, hash;dur=251.3``) into ms per stage."""
+    timings: Dict[str, float] = {}
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            key, _, value = param.partition("=")
+            if name and key.strip() == "dur":
+                try:
+                    timings[name] = float(value.strip('"'))
+                except ValueError:
+                    pass
+    return timings
 
 
 class AuthClient:
     """HTTP client for authentication API."""
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    # How long a fetched JWK Set is trusted before it is re-downloaded
+    JWKS_TTL_SECONDS = 300.0
+    # Refresh the access token once this share of its lifetime has passed
+    REFRESH_AT_FRACTION = 0.8
+    # Wait before retrying a refresh that failed for network or server (5xx) reasons
+    REFRESH_RETRY_SECONDS = 10.0
+
+    def __init__(self, base_url: str = "http://localhost:8000", timing_history: int = 20):
         self.base_url = base_url
         self.token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.token_expires_at: Optional[float] = None
         self.user: Optional[Dict[str, Any]] = None
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._refresh_lock = threading.RLock()
+        self._jwks: Optional[jwt.PyJWKSet] = None
+        self._jwks_fetched_at = 0.0
+        # Server-side timing breakdowns of the most recent requests, newest last
+        self.timings: Deque[Dict[str, Any]] = deque(maxlen=timing_history)
+
+    def _record_timing(self, endpoint: str, response: requests.Response) -> None:
+        header = response.headers.get("Server-Timing")
+        if header:
+            self.timings.append({
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "timings": parse_server_timing(header),
+            })
+
+    def timing_history(self) -> List[Dict[str, Any]]:
+        """The last N server timing breakdowns (``endpoint``, ``status``, ``timings`` in ms)."""
+        return list(self.timings)
 
     def register(self, name: str, email: str, password: str) -> Dict[str, Any]:
         """Register a new user."""
@@ -18,6 +66,7 @@ class AuthClient:
                 json={"name": name, "email": email, "password": password},
                 timeout=5
             )
+            self._record_timing("/register", response)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except requests.exceptions.RequestException as e:
@@ -31,13 +80,113 @@ class AuthClient:
                 json={"email": email, "password": password},
                 timeout=5
             )
+            self._record_timing("/login", response)
             response.raise_for_status()
             data = response.json()
+            self._store_tokens(data)
+            return {"success": True, "data": data}
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": str(e)}
+
+    def _store_tokens(self, data: Dict[str, Any]) -> None:
+        """Keep the tokens of a login/refresh response and schedule the next refresh."""
+        with self._refresh_lock:
             self.token = data.get("access_token")
+            self.refresh_token = data.get("refresh_token")
             self.user = data.get("user")
-            return {"success": True, "data": data}
+            expires_in = data.get("expires_in")
+            self.token_expires_at = time.time() + expires_in if expires_in else None
+            if self.refresh_token and expires_in:
+                self._schedule_refresh(expires_in * self.REFRESH_AT_FRACTION)
+
+    def _schedule_refresh(self, delay: float) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(delay, self._refresh_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _cancel_refresh(self) -> None:
+        with self._refresh_lock:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+
+    def _refresh_in_background(self) -> None:
+        result = self.refresh()
+        if not result["success"] and result.get("retry"):
+            with self._refresh_lock:
+                # Retry while the current access token is still usable
+                if self.refresh_token and (self.token_expires_at or 0) > time.time():
+                    self._schedule_refresh(self.REFRESH_RETRY_SECONDS)
+
+    def refresh(self) -> Dict[str, Any]:
+        """Trade the refresh token for new tokens (no password needed).
+
+        Called in the background before the access token expires, so the
+        dashboard never has to ask for the password again mid-session.
+        """
+        refresh_token = self.refresh_token
+        if not refresh_token:
+            return {"success": False, "error": "Not logged in"}
+        try:
+            response = requests.post(
+                f"{self.base_url}/token/refresh",
+                json={"refresh_token": refresh_token},
+                timeout=5
+            )
+            self._record_timing("/token/refresh", response)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code >= 500:
+                # Server or proxy trouble, not a verdict on the token: try again
+                return {"success": False, "error": str(e), "retry": True}
+            # Rejected (expired, revoked or reused): a new login is needed
+            with self._refresh_lock:
+                if self.refresh_token == refresh_token:
+                    self.refresh_token = None
+            return {"success": False, "error": str(e)}
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": str(e), "retry": True}
+        with self._refresh_lock:
+            if self.refresh_token != refresh_token:
+                # Logged out (or logged in again) while the request was in flight
+                return {"success": False, "error": "Session changed"}
+            self._store_tokens(data)
+        return {"success": True, "data": data}
+
+    def logout(self) -> Dict[str, Any]:
+        """Revoke the current tokens on the server, then forget them locally.
+
+        If the server cannot be reached (or fails with a 5xx) the tokens are
+        kept, so the session can still be ended by trying again.
+        """
+        with self._refresh_lock:
+            token, refresh_token = self.token, self.refresh_token
+        if not token and not refresh_token:
+            return {"success": True, "data": None}
+        try:
+            response = requests.post(
+                f"{self.base_url}/logout",
+                headers={"Authorization": f"Bearer {token}"} if token else None,
+                json={"refresh_token": refresh_token} if refresh_token else None,
+                timeout=5
+            )
+            self._record_timing("/logout", response)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                return {"success": False, "error": str(e)}
+            # Both tokens already rejected: nothing is left to revoke
+            data = None
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": str(e)}
+        self._cancel_refresh()
+        with self._refresh_lock:
+            self.token = self.refresh_token = self.token_expires_at = self.user = None
+        return {"success": True, "data": data}
 
     def verify_token(self, token: str) -> Dict[str, Any]:
         """Verify JWT token."""
@@ -47,14 +196,66 @@ class AuthClient:
                 params={"token": token},
                 timeout=5
             )
+            self._record_timing("/verify", response)
             response.raise_for_status()
             return {"success": True, "data": response.json()}
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": str(e)}
 
+    def _fetch_jwks(self) -> Optional[jwt.PyJWKSet]:
+        """Download the server's public signing keys (None if unavailable)."""
+        try:
+            response = requests.get(f"{self.base_url}/.well-known/jwks.json", timeout=5)
+            response.raise_for_status()
+            keys = response.json().get("keys") or []
+            jwks = jwt.PyJWKSet.from_dict({"keys": keys}) if keys else None
+        except (requests.exceptions.RequestException, ValueError, jwt.PyJWTError):
+            jwks = None
+        self._jwks = jwks
+        self._jwks_fetched_at = time.monotonic()
+        return jwks
+
+    def _signing_key(self, kid: str) -> Optional[jwt.PyJWK]:
+        stale = time.monotonic() - self._jwks_fetched_at > self.JWKS_TTL_SECONDS
+        jwks = self._fetch_jwks() if stale else self._jwks
+        if jwks is not None:
+            for key in jwks.keys:
+                if key.key_id == kid:
+                    return key
+        # Unknown kid: the server may have rotated since the last fetch
+        if not stale:
+            jwks = self._fetch_jwks()
+            if jwks is not None:
+                for key in jwks.keys:
+                    if key.key_id == kid:
+                        return key
+        return None
+
+    def verify_token_locally(self, token: str) -> Optional[Dict[str, Any]]:
+        """Check a token's signature and expiry against the cached JWK Set.
+
+        Returns the token claims, or None if the token is invalid. Raises
+        LookupError when the server publishes no matching key (e.g. it signs
+        with a shared secret), in which case only the server can verify it.
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError:
+            return None
+        key = self._signing_key(kid) if kid else None
+        if key is None:
+            raise LookupError("No published key for this token")
+        try:
+            return jwt.decode(token, key.key, algorithms=[key.algorithm_name])
+        except jwt.PyJWTError:
+            return None
+
     def is_authenticated(self) -> bool:
         """Check if user is authenticated."""
         if not self.token:
             return False
-        result = self.verify_token(self.token)
-        return result["success"]
+        try:
+            return self.verify_token_locally(self.token) is not None
+        except LookupError:
+            result = self.verify_token(self.token)
+            return result["success"]
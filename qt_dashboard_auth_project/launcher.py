@@ -4,8 +4,9 @@ Usage:
   Activate your `qt` venv or run with the venv python, then:
     python launcher.py
 
-The launcher starts the backend in a subprocess, polls the health endpoint `/` until ready,
-then launches the frontend app. When the frontend exits, the backend subprocess is terminated.
+The launcher starts the backend in a subprocess, polls the readiness endpoint
+`/readyz` until the backend has finished warming up, then launches the frontend
+app. When the frontend exits, the backend subprocess is terminated.
 """
 import subprocess
 import sys
@@ -21,17 +22,29 @@ UVICORN_CMD = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1
 FRONTEND_CMD = [sys.executable, str(FRONTEND_DIR / "app.py")]
 
 
-def wait_for_ready(url: str = "http://127.0.0.1:8000/", timeout: float = 15.0) -> bool:
-    start = time.time()
-    while time.time() - start < timeout:
+def wait_for_ready(url: str = "http://127.0.0.1:8000/readyz", timeout: float = 30.0,
+                   first_delay: float = 0.05, max_delay: float = 0.5) -> bool:
+    """Poll the readiness endpoint until it answers 200 or ``timeout`` passes.
+
+    The delay between probes starts at ``first_delay`` and doubles up to
+    ``max_delay``, so a fast start is noticed within tens of milliseconds
+    and a slow one is polled at a steady, light rate.
+    """
+    deadline = time.monotonic() + timeout
+    delay = first_delay
+    while True:
         try:
             with urllib.request.urlopen(url, timeout=1) as r:
                 if r.status == 200:
                     return True
         except Exception:
+            # Connection refused while starting, HTTP 503 while warming up
             pass
-        time.sleep(0.25)
-    return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
 
 
 def main():